@@ -0,0 +1,144 @@
+import json
+import logging
+import threading
+import time
+from concurrent.futures import Future
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+API_HOST = "127.0.0.1"
+API_PORT = 8766
+API_MAX_AGE_SECONDS = 900
+
+logger = logging.getLogger(__name__)
+
+
+class RecommendationCache:
+    """
+    Latest analysis result per ticker, including "no recommendation" results,
+    with a version number per entry for ETags. Concurrent requests for the
+    same missing or expired ticker share a single computation.
+    """
+
+    def __init__(self, max_age=API_MAX_AGE_SECONDS):
+        self.max_age = max_age
+        self.entries = {}
+        self.in_flight = {}
+        self.version = 0
+        self.lock = threading.Lock()
+
+    def put(self, ticker, record):
+        with self.lock:
+            self.version += 1
+            self.entries[ticker] = (record, time.time(), self.version)
+
+    def evict(self, ticker):
+        """
+        Drops a ticker that left the universe, bumping the version so the
+        full listing's ETag changes.
+        """
+        with self.lock:
+            if self.entries.pop(ticker, None) is not None:
+                self.version += 1
+
+    def _fresh(self, ticker, now):
+        entry = self.entries.get(ticker)
+        if entry is not None and now - entry[1] <= self.max_age:
+            return entry
+        return None
+
+    def get_or_compute(self, ticker, compute):
+        """
+        Returns (record, version) for a ticker, computing it at most once at a
+        time when the cached entry is missing or older than max_age.
+        """
+        with self.lock:
+            entry = self._fresh(ticker, time.time())
+            if entry is not None:
+                return entry[0], entry[2]
+            future = self.in_flight.get(ticker)
+            owner = future is None
+            if owner:
+                future = Future()
+                self.in_flight[ticker] = future
+        if owner:
+            try:
+                record = compute(ticker)
+                self.put(ticker, record)
+                future.set_result(None)
+            except Exception as e:
+                future.set_exception(e)
+            finally:
+                with self.lock:
+                    self.in_flight.pop(ticker, None)
+        future.result()
+        with self.lock:
+            record, _, version = self.entries[ticker]
+        return record, version
+
+    def snapshot(self):
+        with self.lock:
+            records = [entry[0] for entry in self.entries.values() if entry[0]]
+            return records, self.version
+
+
+def make_api_handler(cache, compute):
+    class RecommendationHandler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, format, *args):
+            pass
+
+        def _send_json(self, payload, etag):
+            if self.headers.get("If-None-Match") == etag:
+                self.send_response(304)
+                self.send_header("ETag", etag)
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+                return
+            body = json.dumps(payload, default=str).encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Cache-Control", "no-cache")
+            self.send_header("ETag", etag)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_GET(self):
+            parts = [part for part in self.path.split("?")[0].split("/") if part]
+            if parts == ["recommendations"]:
+                records, version = cache.snapshot()
+                self._send_json({"generated_at": datetime.now().isoformat(timespec="seconds"), "data": records},
+                                f'W/"all-{version}"')
+            elif len(parts) == 2 and parts[0] == "recommendations":
+                ticker = parts[1].upper()
+                try:
+                    record, version = cache.get_or_compute(ticker, compute)
+                except Exception as e:
+                    logger.error("Error computing recommendation for %s: %s", ticker, e)
+                    self.send_error(502)
+                    return
+                self._send_json({"generated_at": datetime.now().isoformat(timespec="seconds"),
+                                 "data": [record] if record else []}, f'W/"{ticker}-{version}"')
+            else:
+                self.send_error(404)
+
+    return RecommendationHandler
+
+
+def start_api_server(cache, compute, host=API_HOST, port=API_PORT):
+    """
+    Serves GET /recommendations and GET /recommendations/<TICKER> as JSON on
+    a background thread. The body's "data" list matches the shape the Tines
+    HTTP Request action already consumes.
+    """
+    try:
+        server = ThreadingHTTPServer((host, port), make_api_handler(cache, compute))
+    except OSError as e:
+        logger.error("Could not start recommendations API on %s:%d: %s", host, port, e)
+        return None
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="api-server", daemon=True).start()
+    logger.info("Serving recommendations at http://%s:%d/recommendations", host, port)
+    return server
@@ -0,0 +1,204 @@
+import logging
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+import yfinance as yf
+
+from batch_scoring import score_universe, select_best
+from chain_archive import ARCHIVE_ROOT, list_archived_tickers, open_history
+from log_setup import setup_logging
+from scoring import PROBABILITY_ITM
+from snapshots import SNAPSHOT_DIR, list_tickers, open_snapshots
+
+CHUNK_ROWS = 2_000_000
+BACKTEST_WORKERS = os.cpu_count() or 1
+BACKTEST_OUTPUT = "output/backtest.csv"
+SECONDS_PER_DAY = 86400
+BACKTEST_SOURCE = "archive"  # "archive" replays chain_archive; "snapshots" reads the raw snapshot store
+# Source -> (default root, ticker lister, column loader)
+HISTORY_SOURCES = {
+    "archive": (ARCHIVE_ROOT, list_archived_tickers, open_history),
+    "snapshots": (SNAPSHOT_DIR, list_tickers, open_snapshots),
+}
+
+logger = logging.getLogger(__name__)
+
+
+def snapshot_chunks(times, chunk_rows=CHUNK_ROWS):
+    """
+    Yields (start, stop) row ranges of about chunk_rows that never split a snapshot.
+    """
+    rows = len(times)
+    start = 0
+    while start < rows:
+        stop = min(start + chunk_rows, rows)
+        if stop < rows:
+            boundary = int(np.searchsorted(times, times[stop], side='left'))
+            stop = boundary if boundary > start else int(np.searchsorted(times, times[start], side='right'))
+        yield start, stop
+        start = stop
+
+
+def select_recommendations(columns, start, stop, probability_ITM=PROBABILITY_ITM):
+    """
+    Applies the live recommendation rule to every snapshot in rows
+    start:stop at once, scoring them with score_universe keyed by snapshot
+    time, and returns the chosen row positions plus their probability ITM
+    and edge.
+    """
+    chunk = {name: np.asarray(column[start:stop]) for name, column in columns.items()}
+    with np.errstate(divide='ignore', invalid='ignore'):
+        scored = score_universe(chunk, probability_ITM, key=chunk['time'])
+    best = select_best(scored)
+    return scored['row'][best] + start, scored['probability_ITM'][best], scored['edge'][best]
+
+
+def settle(expiry_days, price_days, closes, today=None):
+    """
+    Returns the settlement close for each expiry (last close on or before the
+    expiration date) and a mask of which contracts have expired with a price.
+    """
+    today = int(time.time() // SECONDS_PER_DAY) if today is None else today
+    if len(price_days) == 0:
+        return np.full(len(expiry_days), np.nan), np.zeros(len(expiry_days), dtype=bool)
+    index = np.searchsorted(price_days, expiry_days, side='right') - 1
+    resolved = (index >= 0) & (expiry_days < today) & (expiry_days <= price_days[-1])
+    settlement = np.where(resolved, closes[np.clip(index, 0, None)], np.nan)
+    return settlement, resolved
+
+
+def backtest_ticker(ticker, price_days, closes, root=None, chunk_rows=CHUNK_ROWS, source=BACKTEST_SOURCE):
+    """
+    Replays every stored snapshot for a ticker in chunks and returns one row
+    per recommendation with its realized outcome at expiry.
+    """
+    default_root, _, load = HISTORY_SOURCES[source]
+    columns = load(ticker, root or default_root)
+    if columns is None:
+        return pd.DataFrame()
+    picks, probabilities, edges = [], [], []
+    for start, stop in snapshot_chunks(columns['time'], chunk_rows):
+        rows, probability, edge = select_recommendations(columns, start, stop)
+        picks.append(rows)
+        probabilities.append(probability)
+        edges.append(edge)
+    rows = np.concatenate(picks) if picks else np.array([], dtype=np.int64)
+    if len(rows) == 0:
+        return pd.DataFrame()
+
+    strike = np.asarray(columns['strike'][rows])
+    is_call = np.asarray(columns['is_call'][rows]).astype(bool)
+    premium = np.asarray(columns['last_price'][rows])
+    expiry = np.asarray(columns['expiry'][rows])
+    settlement, resolved = settle(expiry, price_days, closes)
+    payoff = np.where(is_call, np.maximum(settlement - strike, 0), np.maximum(strike - settlement, 0))
+    with np.errstate(divide='ignore', invalid='ignore'):
+        realized_return = np.where(premium > 0, payoff / premium - 1, np.nan)
+
+    return pd.DataFrame({
+        "ticker": ticker,
+        "time": pd.to_datetime(np.asarray(columns['time'][rows]), unit='s'),
+        "spot": np.asarray(columns['spot'][rows]),
+        "option_type": np.where(is_call, "call", "put"),
+        "strike": strike,
+        "expiry": pd.to_datetime(expiry, unit='D'),
+        "premium": premium,
+        "probability_ITM": np.concatenate(probabilities),
+        "edge": np.concatenate(edges),
+        "resolved": resolved,
+        "settlement": settlement,
+        "finished_itm": resolved & (payoff > 0),
+        "payoff": np.where(resolved, payoff, np.nan),
+        "realized_return": np.where(resolved, realized_return, np.nan),
+    })
+
+
+def fetch_settlement_prices(tickers, start, end):
+    """
+    Downloads daily closes for all tickers in one batched request and returns
+    {ticker: (epoch_days, closes)}.
+    """
+    prices = {}
+    try:
+        data = yf.download(tickers, start=start, end=end, interval="1d", progress=False, group_by='ticker')
+    except Exception as e:
+        logger.error("Error fetching settlement prices: %s", e)
+        return prices
+    for ticker in tickers:
+        try:
+            frame = data[ticker] if isinstance(data.columns, pd.MultiIndex) else data
+            closes = frame['Close'].dropna()
+            days = closes.index.values.astype('datetime64[D]').astype(np.int64)
+            prices[ticker] = (days, closes.to_numpy(dtype=float))
+        except KeyError:
+            logger.warning("No settlement prices for %s.", ticker)
+    return prices
+
+
+def summarize(results):
+    """
+    Returns hit rate and mean realized return overall and by edge quintile.
+    """
+    resolved = results[results['resolved']]
+    if resolved.empty:
+        return pd.DataFrame()
+    buckets = pd.qcut(resolved['edge'], q=min(5, resolved['edge'].nunique()), duplicates='drop')
+    summary = resolved.groupby(buckets, observed=True).agg(
+        count=('edge', 'size'),
+        mean_edge=('edge', 'mean'),
+        itm_rate=('finished_itm', 'mean'),
+        mean_return=('realized_return', 'mean'),
+    )
+    summary.loc['all'] = [len(resolved), resolved['edge'].mean(), resolved['finished_itm'].mean(),
+                          resolved['realized_return'].mean()]
+    return summary
+
+
+def run_backtest(tickers=None, root=None, workers=BACKTEST_WORKERS, prices=None, source=BACKTEST_SOURCE):
+    """
+    Backtests every ticker with stored chains in `source`, one worker
+    process per ticker.
+    """
+    default_root, list_source, load = HISTORY_SOURCES[source]
+    root = root or default_root
+    tickers = tickers or list_source(root)
+    if not tickers:
+        logger.warning("No stored chains under %s.", root)
+        return pd.DataFrame()
+    if prices is None:
+        firsts, lasts = [], []
+        for ticker in tickers:
+            columns = load(ticker, root)
+            if columns is not None and len(columns['time']):
+                firsts.append(int(columns['time'][0]))
+                lasts.append(int(columns['expiry'].max()))
+        if not firsts:
+            return pd.DataFrame()
+        start = pd.to_datetime(min(firsts), unit='s').strftime("%Y-%m-%d")
+        end = (pd.to_datetime(max(lasts), unit='D') + pd.Timedelta(days=1)).strftime("%Y-%m-%d")
+        prices = fetch_settlement_prices(tickers, start, end)
+
+    empty = (np.array([], dtype=np.int64), np.array([]))
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = [pool.submit(backtest_ticker, ticker, *prices.get(ticker, empty), root, CHUNK_ROWS, source)
+                   for ticker in tickers]
+        frames = [future.result() for future in futures]
+    frames = [frame for frame in frames if not frame.empty]
+    return pd.concat(frames, ignore_index=True) if frames else pd.DataFrame()
+
+
+if __name__ == "__main__":
+    setup_logging()
+    start_time = time.perf_counter()
+    results = run_backtest()
+    if results.empty:
+        logger.info("Nothing to backtest.")
+    else:
+        os.makedirs(os.path.dirname(BACKTEST_OUTPUT), exist_ok=True)
+        results.to_csv(BACKTEST_OUTPUT, index=False)
+        logger.info("Backtested %d recommendations in %.1fs, wrote %s",
+                    len(results), time.perf_counter() - start_time, BACKTEST_OUTPUT)
+        logger.info("Outcome by edge quintile:\n%s", summarize(results).to_string())
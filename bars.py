@@ -0,0 +1,198 @@
+import logging
+import os
+import threading
+from functools import partial
+
+import numpy as np
+import pandas as pd
+import yfinance as yf
+
+from hedging import serialized
+
+BAR_CAPACITY = 1024
+BAR_CACHE_DIR = "bar_cache"
+BAR_FIELDS = ("Open", "High", "Low", "Close", "Volume")
+
+logger = logging.getLogger(__name__)
+
+
+class BarRing:
+    """
+    Fixed-size ring of 1-minute bars: epoch-second timestamps plus an OHLCV
+    float array. The newest bar may be replaced while it is still forming.
+    """
+
+    def __init__(self, capacity=BAR_CAPACITY, tz=None):
+        self.capacity = capacity
+        self.tz = tz
+        self.times = np.zeros(capacity, dtype=np.int64)
+        self.values = np.zeros((capacity, len(BAR_FIELDS)))
+        self.start = 0
+        self.count = 0
+
+    def _positions(self):
+        return (self.start + np.arange(self.count)) % self.capacity
+
+    def last_time(self):
+        if self.count == 0:
+            return None
+        return int(self.times[(self.start + self.count - 1) % self.capacity])
+
+    def extend(self, times, values):
+        """
+        Appends bars in time order, first dropping buffered bars at or after
+        the first new timestamp so a refreshed forming bar replaces the old one.
+        """
+        if len(times) == 0:
+            return
+        while self.count and self.last_time() >= times[0]:
+            self.count -= 1
+        if len(times) >= self.capacity:
+            times, values = times[-self.capacity:], values[-self.capacity:]
+            self.start, self.count = 0, 0
+        positions = (self.start + self.count + np.arange(len(times))) % self.capacity
+        self.times[positions] = times
+        self.values[positions] = values
+        overflow = max(0, self.count + len(times) - self.capacity)
+        self.start = (self.start + overflow) % self.capacity
+        self.count = min(self.capacity, self.count + len(times))
+
+    def is_current(self):
+        """
+        True when the newest bar is from today's session in the ring's time
+        zone. Older bars can fall outside what Yahoo serves incrementally.
+        """
+        last = self.last_time()
+        if last is None:
+            return False
+        tz = self.tz or 'UTC'
+        return pd.Timestamp(last, unit='s', tz='UTC').tz_convert(tz).date() == pd.Timestamp.now(tz=tz).date()
+
+    def ordered(self):
+        positions = self._positions()
+        return self.times[positions], self.values[positions]
+
+    def session_frame(self):
+        """
+        Returns the bars of the most recent session as a yfinance-shaped frame.
+        """
+        times, values = self.ordered()
+        if len(times) == 0:
+            return None
+        index = pd.to_datetime(times, unit='s', utc=True)
+        if self.tz:
+            index = index.tz_convert(self.tz)
+        session = index[-1].date()
+        keep = np.asarray(index.date == session)
+        return pd.DataFrame(values[keep], index=index[keep], columns=list(BAR_FIELDS))
+
+
+class BarBuffers:
+    """
+    Per-ticker 1-minute bar rings that download only bars at or after the
+    last one held, and persist to BAR_CACHE_DIR so a restart resumes warm.
+    A ring whose newest bar is from an earlier session is dropped and the
+    current session downloaded whole, since Yahoo rejects 1-minute requests
+    that start too far back.
+    """
+
+    def __init__(self, cache_dir=BAR_CACHE_DIR, capacity=BAR_CAPACITY, guard=None):
+        self.cache_dir = cache_dir
+        self.capacity = capacity
+        self.guard = guard
+        self.rings = {}
+        self.dirty = set()
+        self.failed = set()
+        self.bars_downloaded = 0
+        self.lock = threading.Lock()
+
+    def _path(self, ticker):
+        return os.path.join(self.cache_dir, f"{ticker.replace('/', '_')}.npz")
+
+    def _ring(self, ticker):
+        ring = self.rings.get(ticker)
+        if ring is None:
+            ring = BarRing(self.capacity)
+            path = self._path(ticker)
+            if os.path.exists(path):
+                try:
+                    with np.load(path) as data:
+                        ring.tz = str(data['tz']) or None
+                        ring.extend(data['times'], data['values'])
+                except Exception as e:
+                    logger.warning("Ignoring unreadable bar cache for %s: %s", ticker, e)
+            self.rings[ticker] = ring
+        return ring
+
+    def fetch(self, ticker):
+        """
+        Brings the ticker's ring up to date and returns the latest session's
+        bars. If the download fails the ticker is left in `failed` and the
+        bars already held are returned; an empty download after a dropped
+        stale ring counts as failed too.
+        """
+        with self.lock:
+            ring = self._ring(ticker)
+            stale = ring.count > 0 and not ring.is_current()
+            if stale:
+                logger.debug("Dropping bars of %s from an earlier session.", ticker)
+                ring = self.rings[ticker] = BarRing(self.capacity, ring.tz)
+                self.dirty.add(ticker)
+            last = ring.last_time()
+        if self.guard is None:
+            download = serialized(yf.download)
+        else:
+            download = partial(self.guard.call, "download", yf.download)
+        try:
+            logger.debug("Fetching stock data for %s...", ticker)
+            if last is None:
+                data = download(ticker, period="1d", interval="1m", progress=False)
+            else:
+                data = download(ticker, start=last, interval="1m", progress=False)
+        except Exception as e:
+            logger.warning("Error fetching data for %s: %s", ticker, e)
+            data = None
+        with self.lock:
+            if data is None or (stale and data.empty):
+                self.failed.add(ticker)
+            else:
+                self.failed.discard(ticker)
+            if data is not None and not data.empty:
+                index = data.index
+                if index.tz is not None:
+                    ring.tz = str(index.tz)
+                else:
+                    index = index.tz_localize(ring.tz or 'UTC')
+                times = index.tz_convert('UTC').asi8 // 1_000_000_000
+                values = np.column_stack([np.asarray(data[field], dtype=float).reshape(-1) for field in BAR_FIELDS])
+                ring.extend(times, values)
+                self.bars_downloaded += len(times)
+                self.dirty.add(ticker)
+            frame = ring.session_frame()
+        if frame is None:
+            logger.info("No data available for %s.", ticker)
+        return frame
+
+    def take_download_count(self):
+        with self.lock:
+            count, self.bars_downloaded = self.bars_downloaded, 0
+        return count
+
+    def save(self):
+        """
+        Writes every ring changed since the last save, each atomically.
+        """
+        with self.lock:
+            pending = {ticker: (self.rings[ticker].ordered(), self.rings[ticker].tz) for ticker in self.dirty}
+            self.dirty.clear()
+        if not pending:
+            return
+        os.makedirs(self.cache_dir, exist_ok=True)
+        for ticker, ((times, values), tz) in pending.items():
+            path = self._path(ticker)
+            temp_path = f"{path}.tmp.npz"
+            try:
+                np.savez(temp_path, times=times, values=values, tz=np.array(tz or ""))
+                os.replace(temp_path, path)
+            except OSError as e:
+                logger.warning("Error saving bar cache for %s: %s", ticker, e)
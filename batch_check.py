@@ -0,0 +1,74 @@
+import argparse
+import math
+import os
+import sys
+import tempfile
+
+import bars
+import main
+from synthetic_market import SyntheticMarket, synthetic_tickers
+
+TICKERS = 60
+REL_TOLERANCE = 1e-9
+
+
+def same(left, right):
+    """
+    Compares two records, treating floats as equal within REL_TOLERANCE and
+    NaN as equal to NaN.
+    """
+    if isinstance(left, dict) and isinstance(right, dict):
+        return left.keys() == right.keys() and all(same(left[key], right[key]) for key in left)
+    if isinstance(left, list) and isinstance(right, list):
+        return len(left) == len(right) and all(same(a, b) for a, b in zip(left, right))
+    try:
+        left, right = float(left), float(right)
+    except (TypeError, ValueError):
+        return left == right
+    return (math.isnan(left) and math.isnan(right)) or math.isclose(left, right, rel_tol=REL_TOLERANCE)
+
+
+def run_batch_check(size=TICKERS, seed=0):
+    """
+    Fetches the chains of a synthetic universe once, scores them with
+    analyze_batch and with score_chain one ticker at a time, and returns the
+    tickers whose recommendation, candidates or strategies differ.
+    """
+    tickers = synthetic_tickers(size)
+    os.chdir(tempfile.mkdtemp(prefix="batch-check-"))
+    main.yf = bars.yf = SyntheticMarket(tickers, seed=seed).provider()
+    main.CHAIN_ARCHIVE_ENABLED = False
+    main.SNAPSHOTS_ENABLED = False
+
+    fetched = []
+    for count, ticker in enumerate(tickers, start=1):
+        observations = {}
+        fetched.append((ticker, count, main.fetch_chain(ticker, count, size, observations), observations))
+    batched = main.analyze_batch(fetched, size)
+
+    differences = []
+    for (ticker, count, result, observations), batch_record in zip(fetched, batched):
+        single = {}
+        record = main.score_chain(ticker, count, size, result, single) if result is not None else None
+        for name, left, right in (("recommendation", batch_record, record),
+                                  ("candidates", observations.get('candidates', []), single.get('candidates', [])),
+                                  ("strategies", observations.get('strategies', []), single.get('strategies', []))):
+            if not same(left, right):
+                differences.append((ticker, name))
+    recommended = sum(record is not None for record in batched)
+    print(f"{size} tickers, {recommended} recommendations, {len(differences)} differences")
+    return differences
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Checks that batch scoring matches per-ticker scoring.")
+    parser.add_argument("size", nargs="?", type=int, default=TICKERS)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    differences = run_batch_check(args.size, args.seed)
+    for ticker, name in differences:
+        print(f"{ticker}: {name} differ")
+    if differences:
+        print("FAIL")
+        sys.exit(1)
+    print("OK")
@@ -0,0 +1,124 @@
+import numpy as np
+
+from monte_carlo import MC_SEED, atm_volatility, batch_strike_probabilities, side_probabilities
+from scoring import (CANDIDATE_CRITERIA, CANDIDATES_TOP_N, DEFAULT_IV, HORIZON_DAYS, MAX_PREMIUM, PROBABILITY_ITM,
+                     PROBABILITY_MODEL, RISK_FREE_RATE, calculate_probability_ITM, criterion_key)
+
+
+def concat_chains(chains):
+    """
+    Concatenates (options_df, spot, realized_sigma) chains into one set of
+    column arrays with a per-row ticker key, spot and IV fallback. 'offset'
+    holds where each chain's rows start.
+    """
+    lengths = np.array([len(options_df) for options_df, _, _ in chains], dtype=np.int64)
+    key = np.repeat(np.arange(len(chains), dtype=np.int64), lengths)
+    spots = np.array([spot for _, spot, _ in chains], dtype=float)
+    realized = np.array([sigma or np.nan for _, _, sigma in chains], dtype=float)
+
+    def column(name):
+        parts = [options_df[name].to_numpy(dtype=float) if name in options_df else np.full(len(options_df), np.nan)
+                 for options_df, _, _ in chains]
+        return np.concatenate(parts) if parts else np.array([], dtype=float)
+
+    return {
+        "key": key,
+        "offset": np.concatenate(([0], np.cumsum(lengths)[:-1])) if len(chains) else lengths,
+        "spot": spots[key],
+        "realized_vol": realized[key],
+        "strike": column('strike'),
+        "is_call": np.concatenate([(options_df['optionType'] == 'call').to_numpy() for options_df, _, _ in chains])
+        if chains else np.array([], dtype=bool),
+        "last_price": column('lastPrice'),
+        "iv": column('impliedVolatility'),
+    }
+
+
+def _monte_carlo_probabilities(columns, key, rows, sigma, seeds):
+    """
+    Runs the Monte Carlo model for every group in `rows` through one pool,
+    with the same paths score_options would simulate for each of them.
+    """
+    keys = key[rows]
+    unique, starts = np.unique(keys, return_index=True)
+    groups = np.split(np.arange(len(rows)), starts[1:]) if len(rows) else []
+    jobs = []
+    for key, group in zip(unique.tolist(), groups):
+        spot = columns['spot'][rows[group[0]]]
+        strikes = columns['strike'][rows[group]]
+        jobs.append((spot, strikes, atm_volatility(strikes, sigma[group], spot),
+                     MC_SEED if seeds is None else seeds[key]))
+    probability = np.empty(len(rows))
+    touch = np.empty(len(rows))
+    for group, result in zip(groups, batch_strike_probabilities(jobs, HORIZON_DAYS / 365, RISK_FREE_RATE)):
+        probability[group], touch[group] = side_probabilities(result, columns['is_call'][rows[group]].astype(bool))
+    return probability, touch
+
+
+def score_universe(columns, probability_ITM=PROBABILITY_ITM, model=PROBABILITY_MODEL, seeds=None, key=None):
+    """
+    Applies the premium cap and score_options to every chain at once and
+    returns the positive-edge rows with their key, distance, probability
+    ITM, edge and IV/RV (NaN where the ticker has no realized volatility).
+    Chains are told apart by `key`, columns['key'] by default; backtests
+    pass the snapshot time. `seeds` gives each chain's Monte Carlo seed
+    when that model is used.
+    """
+    key = columns['key'] if key is None else np.asarray(key)
+    spot, strike = np.asarray(columns['spot']), np.asarray(columns['strike'])
+    is_call = np.asarray(columns['is_call']).astype(bool)
+    last_price, iv = np.asarray(columns['last_price']), np.asarray(columns['iv'])
+    keep = (last_price <= MAX_PREMIUM) & ((is_call & (strike > spot)) | (~is_call & (strike < spot)))
+    rows = np.flatnonzero(keep)
+    realized = np.asarray(columns['realized_vol'])[rows]
+    fallback = np.where(np.isnan(realized) | (realized == 0), DEFAULT_IV, realized)
+    sigma = np.where(np.isnan(iv[rows]), fallback, iv[rows])
+    touch = None
+    if model == "monte_carlo":
+        probability, touch = _monte_carlo_probabilities(columns, key, rows, sigma, seeds)
+    else:
+        probability = calculate_probability_ITM(spot[rows], strike[rows], HORIZON_DAYS / 365, RISK_FREE_RATE,
+                                                sigma)
+    edge = (probability / probability_ITM - 1) * 100
+    positive = edge > 0
+    rows = rows[positive]
+    scored = {
+        "row": rows,
+        "key": key[rows],
+        "distance": np.abs(strike[rows] - spot[rows]),
+        "probability_ITM": probability[positive],
+        "edge": edge[positive],
+        "iv_rv": sigma[positive] / realized[positive],
+        "last_price": last_price[rows],
+    }
+    if touch is not None:
+        scored['probability_touch'] = touch[positive]
+    return scored
+
+
+def select_best(scored):
+    """
+    Group-wise arg-min of distance per ticker key, ties going to the first
+    row of the chain as in closest_option. Returns positions into `scored`.
+    """
+    order = np.lexsort((scored['row'], scored['distance'], scored['key']))
+    _, first = np.unique(scored['key'][order], return_index=True)
+    return order[first]
+
+
+def top_candidates(scored, top_n=CANDIDATES_TOP_N, criteria=CANDIDATE_CRITERIA):
+    """
+    Group-wise version of rank_candidates: for each criterion, the first
+    top_n positions into `scored` per ticker key in the same order. Returns
+    (criterion, positions, ranks) tuples.
+    """
+    results = []
+    for criterion in criteria:
+        key = criterion_key(criterion, scored['distance'], scored['edge'], scored['last_price'])
+        finite = np.flatnonzero(np.isfinite(key))
+        order = finite[np.lexsort((scored['row'][finite], key[finite], scored['key'][finite]))]
+        groups = scored['key'][order]
+        rank = np.arange(len(order)) - np.searchsorted(groups, groups, side='left') + 1
+        picked = rank <= top_n
+        results.append((criterion, order[picked], rank[picked]))
+    return results
@@ -0,0 +1,115 @@
+import pickle
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from backtest import select_recommendations
+from shared_chains import attach_columns, score_shared_chain, share_chain
+from snapshots import chain_columns
+
+CHAIN_SIZES = [(20, 100), (30, 200), (40, 400)]  # (expirations, strikes per side)
+REPEATS = 20
+
+
+def make_large_chain(expirations, strikes_per_side, spot=500.0, seed=0):
+    """
+    Builds a combined calls/puts frame the size of a large index/ETF chain.
+    """
+    rng = np.random.default_rng(seed)
+    strikes = np.round(np.linspace(spot * 0.5, spot * 1.5, strikes_per_side), 1)
+    dates = pd.bdate_range("2026-11-20", periods=expirations, freq="W-FRI").strftime("%Y-%m-%d")
+    frames = []
+    for expiration in dates:
+        for kind in ("call", "put"):
+            frames.append(pd.DataFrame({
+                "contractSymbol": [f"SPY{expiration}{kind[0]}{int(k * 1000):08d}" for k in strikes],
+                "strike": strikes,
+                "lastPrice": np.abs(rng.normal(5.0, 3.0, len(strikes))),
+                "bid": np.abs(rng.normal(5.0, 3.0, len(strikes))),
+                "ask": np.abs(rng.normal(5.2, 3.0, len(strikes))),
+                "volume": rng.integers(0, 5000, len(strikes)).astype(float),
+                "openInterest": rng.integers(0, 50000, len(strikes)),
+                "impliedVolatility": rng.uniform(0.1, 0.8, len(strikes)),
+                "inTheMoney": False,
+                "optionType": kind,
+                "expiration": expiration,
+            }))
+    return pd.concat(frames, ignore_index=True)
+
+
+def score_pickled_chain(payload):
+    options_df, spot = pickle.loads(payload)
+    columns = chain_columns(options_df, spot)
+    rows, probability, edge = select_recommendations(columns, 0, len(options_df))
+    return None if len(rows) == 0 else int(rows[0])
+
+
+def score_pickled_columns(payload):
+    columns = pickle.loads(payload)
+    rows, probability, edge = select_recommendations(columns, 0, len(columns['time']))
+    return None if len(rows) == 0 else int(rows[0])
+
+
+def attach_only(descriptor):
+    block, columns = attach_columns(descriptor)
+    rows = len(columns['time'])
+    del columns
+    block.close()
+    return rows
+
+
+def unpickle_only(payload):
+    return len(pickle.loads(payload)[0])
+
+
+def unpickle_columns_only(payload):
+    return len(pickle.loads(payload)['time'])
+
+
+def timed(pool, function, argument, repeats=REPEATS):
+    pool.submit(function, argument).result()
+    start = time.perf_counter()
+    for _ in range(repeats):
+        pool.submit(function, argument).result()
+    return (time.perf_counter() - start) / repeats * 1000
+
+
+# Three ways to hand a chain to a worker: pickling the DataFrame, pickling the
+# compact chain_columns dict, and sharing those columns. The middle one
+# separates the gain from shrinking the data from the gain of skipping the
+# copy. shared_chains is not wired into main.py; this measures whether it would pay off.
+if __name__ == "__main__":
+    with ProcessPoolExecutor(max_workers=1) as pool:
+        print(f"{'rows':>8} {'pickle MB':>10} {'cols MB':>8} {'pickle xfer':>12} {'cols xfer':>10} "
+              f"{'shm xfer':>10} {'pickle+score':>13} {'cols+score':>11} {'shm+score':>10}  (ms per chain)")
+        for expirations, strikes in CHAIN_SIZES:
+            chain = make_large_chain(expirations, strikes)
+            spot = 500.0
+
+            start = time.perf_counter()
+            payload = pickle.dumps((chain, spot), protocol=pickle.HIGHEST_PROTOCOL)
+            pickle_ms = (time.perf_counter() - start) * 1000
+            pickle_transfer = pickle_ms + timed(pool, unpickle_only, payload)
+            pickle_score = pickle_ms + timed(pool, score_pickled_chain, payload)
+
+            start = time.perf_counter()
+            columns_payload = pickle.dumps(chain_columns(chain, spot), protocol=pickle.HIGHEST_PROTOCOL)
+            columns_ms = (time.perf_counter() - start) * 1000
+            columns_transfer = columns_ms + timed(pool, unpickle_columns_only, columns_payload)
+            columns_score = columns_ms + timed(pool, score_pickled_columns, columns_payload)
+
+            start = time.perf_counter()
+            block, descriptor = share_chain(chain, spot)
+            share_ms = (time.perf_counter() - start) * 1000
+            try:
+                shared_transfer = share_ms + timed(pool, attach_only, descriptor)
+                shared_score = share_ms + timed(pool, score_shared_chain, descriptor)
+            finally:
+                block.close()
+                block.unlink()
+
+            print(f"{len(chain):>8} {len(payload) / 1e6:>10.2f} {len(columns_payload) / 1e6:>8.2f} "
+                  f"{pickle_transfer:>12.2f} {columns_transfer:>10.2f} {shared_transfer:>10.2f} "
+                  f"{pickle_score:>13.2f} {columns_score:>11.2f} {shared_score:>10.2f}")
@@ -0,0 +1,250 @@
+import io
+import logging
+import os
+import struct
+import threading
+import time
+
+import numpy as np
+
+from snapshots import chain_columns
+
+ARCHIVE_ROOT = "chain_archive"
+SECONDS_PER_DAY = 86400
+VALUE_COLUMNS = ("last_price", "iv", "volume")
+CONTRACT_COLUMNS = ("expiry", "strike", "is_call")
+KEYFRAME_INTERVAL = 12  # deltas between full snapshots, bounding how many frames a read replays
+
+# Frame header: kind (b"B" base or b"D" delta), snapshot time, spot, payload length.
+_HEADER = struct.Struct("<cqdI")
+
+logger = logging.getLogger(__name__)
+
+
+def contract_keys(expiry, strike, is_call):
+    """
+    Packs expiration day, call/put and strike (to 0.001) into one sortable int64 per contract.
+    """
+    return ((np.asarray(expiry, dtype=np.int64) * 2 + np.asarray(is_call, dtype=np.int64)) * 10_000_000_000
+            + np.round(np.asarray(strike, dtype=float) * 1000).astype(np.int64))
+
+
+def _sorted_chain(columns):
+    keys = contract_keys(columns['expiry'], columns['strike'], columns['is_call'])
+    order = np.argsort(keys, kind='stable')
+    keys = keys[order]
+    last = np.append(keys[1:] != keys[:-1], True)
+    chain = {name: np.asarray(columns[name])[order][last] for name in CONTRACT_COLUMNS + VALUE_COLUMNS}
+    return keys[last], chain
+
+
+def _same(old, new):
+    return (old == new) | (np.isnan(old) & np.isnan(new))
+
+
+def _encode(arrays):
+    buffer = io.BytesIO()
+    np.savez_compressed(buffer, **arrays)
+    return buffer.getvalue()
+
+
+def _decode(payload):
+    with np.load(io.BytesIO(payload)) as data:
+        return {name: data[name] for name in data.files}
+
+
+def apply_delta(keys, chain, delta):
+    """
+    Returns the chain after a delta frame: removed contracts dropped and
+    changed or new contracts replaced or added, kept in key order.
+    """
+    changed = contract_keys(delta['expiry'], delta['strike'], delta['is_call'])
+    kept = ~np.isin(keys, np.concatenate((delta['removed'], changed)))
+    merged_keys = np.concatenate((keys[kept], changed))
+    order = np.argsort(merged_keys, kind='stable')
+    merged = {name: np.concatenate((chain[name][kept], delta[name]))[order] for name in chain}
+    return merged_keys[order], merged
+
+
+def read_index(path):
+    """
+    Returns (kind, time, spot, offset, length) for every complete frame in
+    an archive file, reading only the headers. A torn last frame is left out.
+    """
+    index = []
+    size = os.path.getsize(path)
+    with open(path, 'rb') as file:
+        offset = 0
+        while offset + _HEADER.size <= size:
+            file.seek(offset)
+            kind, when, spot, length = _HEADER.unpack(file.read(_HEADER.size))
+            if offset + _HEADER.size + length > size:
+                break
+            index.append((kind, when, spot, offset + _HEADER.size, length))
+            offset += _HEADER.size + length
+    return index
+
+
+def _replay(path, until=None, start_at_keyframe=False):
+    index = [frame for frame in read_index(path) if until is None or frame[1] <= until]
+    first = 0
+    if start_at_keyframe:
+        bases = [position for position, frame in enumerate(index) if frame[0] == b"B"]
+        first = bases[-1] if bases else len(index)
+    keys = chain = None
+    with open(path, 'rb') as file:
+        for kind, when, spot, offset, length in index[first:]:
+            file.seek(offset)
+            arrays = _decode(file.read(length))
+            # Frames written before realized vol was archived lack it.
+            realized_vol = float(arrays.pop('realized_vol', np.nan))
+            if kind == b"B":
+                keys, chain = _sorted_chain(arrays)
+            elif chain is not None:
+                keys, chain = apply_delta(keys, chain, arrays)
+            else:
+                continue
+            yield when, spot, realized_vol, keys, chain
+
+
+def _as_columns(when, spot, realized_vol, chain):
+    rows = len(chain['strike'])
+    columns = {"time": np.full(rows, when, dtype=np.int64), "spot": np.full(rows, spot),
+               "realized_vol": np.full(rows, realized_vol)}
+    columns.update(chain)
+    return columns
+
+
+def chain_history(path, until=None):
+    """
+    Replays an archive file and yields (time, columns) for every snapshot
+    up to `until`, with columns shaped like snapshots.chain_columns.
+    """
+    for when, spot, realized_vol, _, chain in _replay(path, until):
+        yield when, _as_columns(when, spot, realized_vol, chain)
+
+
+def list_archived_tickers(root=ARCHIVE_ROOT):
+    """
+    Returns every ticker with at least one archived day, sorted.
+    """
+    if not os.path.isdir(root):
+        return []
+    tickers = set()
+    for day in os.listdir(root):
+        directory = os.path.join(root, day)
+        if os.path.isdir(directory):
+            tickers.update(name[:-len(".chz")] for name in os.listdir(directory) if name.endswith(".chz"))
+    return sorted(tickers)
+
+
+def open_history(ticker, root=ARCHIVE_ROOT):
+    """
+    Replays every archived day of a ticker and returns all its snapshots as
+    one set of columns in time order, shaped like snapshots.open_snapshots,
+    or None if nothing is archived.
+    """
+    if not os.path.isdir(root):
+        return None
+    name = f"{ticker.replace('/', '_')}.chz"
+    paths = [os.path.join(root, day, name) for day in sorted(os.listdir(root))]
+    parts = [columns for path in paths if os.path.exists(path) for _, columns in chain_history(path)]
+    if not parts:
+        return None
+    return {column: np.concatenate([part[column] for part in parts]) for column in parts[0]}
+
+
+class ChainArchive:
+    """
+    Keeps every fetched chain as one file per ticker per UTC day: a base
+    snapshot from the day's first fetch and every KEYFRAME_INTERVAL deltas
+    after it, and otherwise per-fetch deltas holding only contracts that
+    are new or whose price, IV or volume changed, plus the keys of
+    contracts that disappeared. Every frame also carries the ticker's
+    realized volatility at the fetch, so backtests replay the IV fallback. Frames are compressed column sets behind a
+    small fixed header, so readers find the latest base from the headers
+    alone and decompress only the frames from there on.
+    """
+
+    def __init__(self, root=ARCHIVE_ROOT):
+        self.root = root
+        self.state = {}
+        self.bytes_written = 0
+        self.lock = threading.Lock()
+
+    def path(self, ticker, day):
+        return os.path.join(self.root, str(np.datetime64(day, 'D')), f"{ticker.replace('/', '_')}.chz")
+
+    def _recover(self, path):
+        """
+        Returns (keys, chain, deltas since the last base) for the last frame
+        of an existing day file, or None.
+        """
+        if not os.path.exists(path):
+            return None
+        index = read_index(path)
+        bases = [position for position, frame in enumerate(index) if frame[0] == b"B"]
+        last = None
+        for _, _, _, keys, chain in _replay(path, start_at_keyframe=True):
+            last = keys, chain
+        if last is None:
+            return None
+        return last + (len(index) - 1 - bases[-1],)
+
+    def append(self, ticker, options_df, spot, when=None, realized_vol=None):
+        """
+        Archives one fetched chain. Errors are logged, never raised, so
+        archiving cannot fail an analysis.
+        """
+        try:
+            when = int(time.time() if when is None else when)
+            keys, chain = _sorted_chain(chain_columns(options_df, spot, when))
+            day = when // SECONDS_PER_DAY
+            path = self.path(ticker, day)
+            with self.lock:
+                previous = self.state.get(ticker)
+                if previous is None or previous[0] != day:
+                    recovered = self._recover(path)
+                    previous = None if recovered is None else (day,) + recovered
+                if previous is None or previous[3] >= KEYFRAME_INTERVAL:
+                    kind, arrays, deltas = b"B", chain, 0
+                else:
+                    kind, arrays, deltas = b"D", self._delta(previous[1], previous[2], keys, chain), previous[3] + 1
+                realized = float(realized_vol) if realized_vol else np.nan
+                payload = _encode(dict(arrays, realized_vol=np.array(realized)))
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                with open(path, 'ab') as file:
+                    file.write(_HEADER.pack(kind, when, float(spot), len(payload)) + payload)
+                self.bytes_written += _HEADER.size + len(payload)
+                self.state[ticker] = (day, keys, chain, deltas)
+        except Exception as e:
+            logger.warning("Error archiving chain for %s: %s", ticker, e)
+
+    @staticmethod
+    def _delta(old_keys, old_chain, keys, chain):
+        position = np.minimum(np.searchsorted(old_keys, keys), max(len(old_keys) - 1, 0))
+        present = (old_keys[position] == keys) if len(old_keys) else np.zeros(len(keys), dtype=bool)
+        changed = ~present
+        for name in VALUE_COLUMNS:
+            changed |= present & ~_same(old_chain[name][position], chain[name])
+        delta = {name: values[changed] for name, values in chain.items()}
+        delta['removed'] = old_keys[~np.isin(old_keys, keys, assume_unique=True)]
+        return delta
+
+
+def chain_at(ticker, when, root=ARCHIVE_ROOT):
+    """
+    Reconstructs a ticker's chain as it was last fetched at or before
+    `when` (epoch seconds) on that UTC day. Returns columns shaped like
+    snapshots.chain_columns, or None.
+    """
+    path = ChainArchive(root).path(ticker, int(when) // SECONDS_PER_DAY)
+    if not os.path.exists(path):
+        return None
+    latest = None
+    for latest in _replay(path, until=when, start_at_keyframe=True):
+        pass
+    if latest is None:
+        return None
+    frame_time, spot, realized_vol, _, chain = latest
+    return _as_columns(frame_time, spot, realized_vol, chain)
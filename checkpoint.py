@@ -0,0 +1,123 @@
+import json
+import logging
+import os
+import threading
+import time
+
+CHECKPOINT_DIR = "checkpoint"
+RESUME_MAX_AGE_SECONDS = 6 * 3600
+
+logger = logging.getLogger(__name__)
+
+
+def _atomic_write(path, text):
+    temp_path = f"{path}.tmp"
+    with open(temp_path, 'w') as file:
+        file.write(text)
+        file.flush()
+        os.fsync(file.fileno())
+    os.replace(temp_path, path)
+
+
+class CycleCheckpoint:
+    """
+    Local record of loop progress. state.json holds the last completed cycle
+    and is replaced atomically at each cycle end. cycle.jsonl is an append-only
+    journal of the in-flight cycle, one fsynced line per finished ticker, so a
+    torn last line is the worst a crash can leave. Callers record a ticker
+    only once its row has reached the outputs, so resumed tickers are never
+    missing from them. Fetched chains are not kept here: chain_archive
+    already holds every one of them.
+    """
+
+    def __init__(self, directory=CHECKPOINT_DIR):
+        self.directory = directory
+        self.state_path = os.path.join(directory, "state.json")
+        self.journal_path = os.path.join(directory, "cycle.jsonl")
+        self.journal = None
+        self.cycle = None
+        self.lock = threading.Lock()
+
+    def load_state(self):
+        """
+        Returns the saved loop state, however old, or None if there is none.
+        Its retention rows stay valid across any downtime.
+        """
+        try:
+            with open(self.state_path) as file:
+                return json.load(file)
+        except (OSError, ValueError):
+            return None
+
+    def in_flight(self, max_age=RESUME_MAX_AGE_SECONDS):
+        """
+        Returns {"cycle", "completed": {ticker: result}, "expired"} for a
+        cycle that was interrupted, or None. A journal last written more than
+        max_age seconds ago is marked expired: its rows are in the outputs,
+        but its results are too old to skip re-analysis.
+        """
+        try:
+            age = time.time() - os.path.getmtime(self.journal_path)
+            with open(self.journal_path) as file:
+                lines = file.read().splitlines()
+        except OSError:
+            return None
+        if not lines:
+            return None
+        try:
+            header = json.loads(lines[0])
+        except ValueError:
+            return None
+        completed = {}
+        for line in lines[1:]:
+            try:
+                entry = json.loads(line)
+            except ValueError:
+                break
+            completed[entry['ticker']] = entry['result']
+        return {"cycle": header['cycle'], "completed": completed, "expired": age > max_age}
+
+    def begin(self, cycle, resume=False):
+        """
+        Opens the journal for a cycle, continuing the existing one when resuming.
+        """
+        os.makedirs(self.directory, exist_ok=True)
+        if not resume:
+            _atomic_write(self.journal_path, json.dumps({"cycle": cycle, "started_at": time.time()}) + "\n")
+        else:
+            with open(self.journal_path, 'rb+') as file:
+                content = file.read()
+                file.truncate(content.rfind(b"\n") + 1)
+        self.journal = open(self.journal_path, 'a')
+        self.cycle = cycle
+
+    def record(self, ticker, result, cycle=None):
+        """
+        Journals a finished ticker. Safe to call from sink threads; a record
+        for another cycle than the open one, such as a row whose write was
+        retried past its cycle's end, is ignored.
+        """
+        with self.lock:
+            if self.journal is None or (cycle is not None and cycle != self.cycle):
+                return
+            self.journal.write(json.dumps({"ticker": ticker, "result": result}, default=str) + "\n")
+            self.journal.flush()
+            os.fsync(self.journal.fileno())
+
+    def save_state(self, cycle, **state):
+        os.makedirs(self.directory, exist_ok=True)
+        _atomic_write(self.state_path, json.dumps(dict(state, last_completed_cycle=cycle, updated_at=time.time())))
+
+    def finish(self, cycle, **state):
+        """
+        Marks a cycle complete: saves the loop state, then drops the journal.
+        """
+        with self.lock:
+            if self.journal is not None:
+                self.journal.close()
+                self.journal = None
+        self.save_state(cycle, **state)
+        try:
+            os.remove(self.journal_path)
+        except FileNotFoundError:
+            pass
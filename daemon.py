@@ -0,0 +1,85 @@
+import ctypes
+import ctypes.util
+import gc
+import logging
+import os
+import resource
+import sys
+
+import yfinance as yf
+
+from hedging import DOWNLOAD_LOCK
+from log_setup import stop_logging
+
+MEMORY_BUDGET_MB = 0  # 0 disables recycling
+RECYCLE_ENV_VAR = "SHEETS_RECYCLE_COUNT"
+
+logger = logging.getLogger(__name__)
+_libc = None
+
+
+def current_rss_mb():
+    """
+    Returns the resident set size of this process in megabytes. Uses
+    /proc/self/statm where available and falls back to peak RSS elsewhere.
+    """
+    try:
+        with open("/proc/self/statm") as file:
+            pages = int(file.read().split()[1])
+        return pages * os.sysconf("SC_PAGE_SIZE") / (1024 * 1024)
+    except (OSError, ValueError, IndexError):
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def _trim_heap():
+    global _libc
+    if not sys.platform.startswith("linux"):
+        return
+    if _libc is None:
+        _libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6")
+    if hasattr(_libc, "malloc_trim"):
+        _libc.malloc_trim(0)
+
+
+def release_cycle_state():
+    """
+    Drops state that yfinance and pandas keep between cycles: the shared
+    download dicts, the response cache, unreachable frames, and free heap
+    pages glibc would otherwise hold on to. Waits for any running download,
+    which reads the shared dicts until it returns.
+    """
+    try:
+        with DOWNLOAD_LOCK:
+            yf.shared._DFS = {}
+            yf.shared._ERRORS = {}
+            yf.shared._TRACEBACKS = {}
+            yf.shared._ISINS = {}
+        cache_get = getattr(getattr(yf.data, "YfData", None), "cache_get", None)
+        if cache_get is not None and hasattr(cache_get, "cache_clear"):
+            cache_get.cache_clear()
+    except Exception as e:
+        logger.debug("Could not reset yfinance caches: %s", e)
+    gc.collect()
+    try:
+        _trim_heap()
+    except OSError as e:
+        logger.debug("malloc_trim unavailable: %s", e)
+
+
+def over_budget(rss_mb, budget_mb=MEMORY_BUDGET_MB):
+    return budget_mb > 0 and rss_mb > budget_mb
+
+
+def recycle_process():
+    """
+    Replaces the current process with a fresh copy of itself, which returns
+    all memory to the OS while keeping the same PID for the service manager.
+    """
+    count = int(os.environ.get(RECYCLE_ENV_VAR, "0")) + 1
+    os.environ[RECYCLE_ENV_VAR] = str(count)
+    logger.warning("Memory budget exceeded, recycling process (recycle #%d).", count)
+    stop_logging()
+    sys.stdout.flush()
+    sys.stderr.flush()
+    os.execv(sys.executable, [sys.executable] + sys.argv)
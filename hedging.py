@@ -0,0 +1,156 @@
+import logging
+import threading
+import time
+from collections import defaultdict, deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+import numpy as np
+
+CALL_DEADLINES = {"options": 15.0, "option_chain": 15.0, "download": 20.0, "quote": 10.0}
+DEFAULT_CALL_DEADLINE = 20.0
+HEDGING_ENABLED = True
+HEDGED_CALLS = ("options", "option_chain")
+SERIALIZED_CALLS = ("download",)  # yf.download resets and polls yfinance.shared, so downloads never overlap
+HEDGE_PERCENTILE = 95
+HEDGE_MIN_SAMPLES = 20
+LATENCY_WINDOW = 500
+CALL_WORKERS = 16
+
+logger = logging.getLogger(__name__)
+
+# Held by every yf.download and by anything that resets yfinance.shared.
+DOWNLOAD_LOCK = threading.Lock()
+
+
+def serialized(fn):
+    """
+    Wraps fn so it runs under DOWNLOAD_LOCK.
+    """
+    def run(*args, **kwargs):
+        with DOWNLOAD_LOCK:
+            return fn(*args, **kwargs)
+    return run
+
+
+class CallTimeout(TimeoutError):
+    pass
+
+
+class CallGuard:
+    """
+    Runs provider calls on a worker pool with a deadline per call type. With
+    hedging on, a call that has not answered by the p95 latency of its type
+    gets one duplicate and whichever succeeds first wins. A call past its
+    deadline raises CallTimeout; its thread cannot be killed, so it runs on
+    and the late result is discarded. Serialized call types are never
+    hedged and run one at a time on their own worker under DOWNLOAD_LOCK,
+    so a download that timed out still blocks the next one until it ends.
+    """
+
+    def __init__(self, deadlines=None, hedging=HEDGING_ENABLED, hedged_calls=HEDGED_CALLS, workers=CALL_WORKERS,
+                 serialized_calls=SERIALIZED_CALLS):
+        self.deadlines = dict(CALL_DEADLINES if deadlines is None else deadlines)
+        self.hedging = hedging
+        self.serialized_calls = set(serialized_calls)
+        self.hedged_calls = set(hedged_calls) - self.serialized_calls
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="provider-call")
+        self.serial_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="provider-download")
+        self.attempts = defaultdict(lambda: deque(maxlen=LATENCY_WINDOW))
+        self.served = defaultdict(lambda: deque(maxlen=LATENCY_WINDOW))
+        self.counts = defaultdict(lambda: {"calls": 0, "hedged": 0, "hedge_wins": 0, "timeouts": 0, "errors": 0})
+        self.lock = threading.Lock()
+
+    def _attempt(self, kind, fn, args, kwargs):
+        start = time.perf_counter()
+        if kind in self.serialized_calls:
+            future = self.serial_executor.submit(serialized(fn), *args, **kwargs)
+        else:
+            future = self.executor.submit(fn, *args, **kwargs)
+
+        def record(done):
+            if not done.cancelled() and done.exception() is None:
+                with self.lock:
+                    self.attempts[kind].append(time.perf_counter() - start)
+
+        future.add_done_callback(record)
+        return future
+
+    def hedge_delay(self, kind):
+        """
+        Returns how long to wait before hedging a call of this type, or None
+        while there are too few successful attempts to estimate p95.
+        """
+        if not self.hedging or kind not in self.hedged_calls:
+            return None
+        with self.lock:
+            samples = list(self.attempts[kind])
+        if len(samples) < HEDGE_MIN_SAMPLES:
+            return None
+        return float(np.percentile(samples, HEDGE_PERCENTILE))
+
+    def call(self, kind, fn, *args, **kwargs):
+        """
+        Returns fn(*args, **kwargs), raising CallTimeout if no attempt answers
+        within the deadline for `kind`, or the call's own exception.
+        """
+        deadline = self.deadlines.get(kind, DEFAULT_CALL_DEADLINE)
+        start = time.perf_counter()
+        primary = self._attempt(kind, fn, args, kwargs)
+        pending = [primary]
+        hedge_at = self.hedge_delay(kind)
+        if hedge_at is not None and hedge_at >= deadline:
+            hedge_at = None
+        error = None
+        with self.lock:
+            self.counts[kind]["calls"] += 1
+        while pending:
+            elapsed = time.perf_counter() - start
+            if elapsed >= deadline:
+                break
+            timeout = deadline - elapsed
+            if hedge_at is not None:
+                timeout = min(timeout, max(0.0, hedge_at - elapsed))
+            done, _ = wait(pending, timeout=timeout, return_when=FIRST_COMPLETED)
+            for future in done:
+                pending.remove(future)
+                if future.exception() is None:
+                    with self.lock:
+                        self.served[kind].append(time.perf_counter() - start)
+                        if future is not primary:
+                            self.counts[kind]["hedge_wins"] += 1
+                    return future.result()
+                error = future.exception()
+            if hedge_at is not None and pending and time.perf_counter() - start >= hedge_at:
+                hedge_at = None
+                pending.append(self._attempt(kind, fn, args, kwargs))
+                with self.lock:
+                    self.counts[kind]["hedged"] += 1
+        for future in pending:
+            future.cancel()
+        with self.lock:
+            self.counts[kind]["errors" if not pending else "timeouts"] += 1
+        if not pending:
+            raise error
+        raise CallTimeout(f"{kind} call did not answer within {deadline:.0f}s")
+
+    def latency_report(self):
+        """
+        Returns one line per call type with p50/p99 of single attempts, which
+        is what the calls would cost without hedging, and of served calls.
+        """
+        lines = []
+        with self.lock:
+            kinds = sorted(self.counts)
+            stats = {kind: (list(self.attempts[kind]), list(self.served[kind]), dict(self.counts[kind]))
+                     for kind in kinds}
+        for kind in kinds:
+            attempts, served, counts = stats[kind]
+            line = f"{kind}: {counts['calls']} calls"
+            for label, samples in (("attempt", attempts), ("served", served)):
+                if samples:
+                    p50, p99 = np.percentile(samples, [50, 99]) * 1000
+                    line += f", {label} p50 {p50:.0f} ms p99 {p99:.0f} ms"
+            line += (f", {counts['hedged']} hedged ({counts['hedge_wins']} won), "
+                     f"{counts['timeouts']} timeouts, {counts['errors']} errors")
+            lines.append(line)
+        return lines
@@ -0,0 +1,96 @@
+import sys
+import time
+from types import SimpleNamespace
+
+import numpy as np
+import pandas as pd
+
+import bars
+import main
+from daemon import current_rss_mb, release_cycle_state
+from sinks import FanOut
+from streaming import RecommendationStream
+
+CYCLES = 2000
+WARMUP_CYCLES = 50
+TICKERS = ["AAA", "BBB", "CCC"]
+EXPIRATIONS = ["2026-11-20", "2026-12-18"]
+STRIKES_PER_SIDE = 30
+MAX_GROWTH_MB = 16.0
+
+
+def make_chain(spot, expiration, seed):
+    """
+    Builds a fixture calls/puts frame pair shaped like yfinance's option_chain output.
+    """
+    rng = np.random.default_rng(seed)
+    strikes = np.round(spot * np.linspace(0.7, 1.3, STRIKES_PER_SIDE), 1)
+    frames = []
+    for kind in ("C", "P"):
+        frames.append(pd.DataFrame({
+            "contractSymbol": [f"FIX{expiration.replace('-', '')}{kind}{int(k * 1000):08d}" for k in strikes],
+            "strike": strikes,
+            "lastPrice": np.abs(rng.normal(3.0, 1.0, len(strikes))),
+            "volume": rng.integers(0, 1000, len(strikes)),
+            "openInterest": rng.integers(0, 5000, len(strikes)),
+            "impliedVolatility": rng.uniform(0.15, 0.6, len(strikes)),
+        }))
+    return SimpleNamespace(calls=frames[0], puts=frames[1])
+
+
+class FixtureTicker:
+    def __init__(self, ticker):
+        self.ticker = ticker
+        self.options = tuple(EXPIRATIONS)
+        self._underlying = {
+            "regularMarketPrice": 100.0 + len(ticker),
+            "regularMarketTime": time.time(),
+            "marketState": "REGULAR",
+        }
+
+    def option_chain(self, expiration):
+        return make_chain(100.0 + len(self.ticker), expiration, hash((self.ticker, expiration)) & 0xFFFF)
+
+
+def fixture_download(ticker, period=None, interval=None, progress=False):
+    index = pd.date_range("2026-10-19 09:30", periods=390, freq="1min")
+    close = 100.0 + len(ticker) + np.cumsum(np.full(390, 0.01))
+    return pd.DataFrame({"Open": close, "High": close, "Low": close, "Close": close, "Volume": 1000}, index=index)
+
+
+def run_leak_check(cycles=CYCLES, warmup=WARMUP_CYCLES, max_growth_mb=MAX_GROWTH_MB):
+    """
+    Runs many analysis cycles against fixture chains and returns the RSS
+    growth in megabytes between the end of warm-up and the last cycle.
+    """
+    real_yf = main.yf, bars.yf
+    real_archiving = main.CHAIN_ARCHIVE_ENABLED, main.SNAPSHOTS_ENABLED
+    main.yf = bars.yf = SimpleNamespace(download=fixture_download, Ticker=FixtureTicker)
+    main.CHAIN_ARCHIVE_ENABLED = main.SNAPSHOTS_ENABLED = False  # fixture chains stay out of the working tree
+    outputs = FanOut([])
+    stream = RecommendationStream()
+    try:
+        baseline = None
+        start = time.perf_counter()
+        for cycle in range(1, cycles + 1):
+            main.run_cycle(TICKERS, outputs, stream)
+            release_cycle_state()
+            if cycle == warmup:
+                baseline = current_rss_mb()
+            if cycle % 250 == 0:
+                print(f"cycle {cycle}: rss {current_rss_mb():.1f} MB")
+        growth = current_rss_mb() - baseline
+        print(f"{cycles} cycles in {time.perf_counter() - start:.1f}s, RSS growth after warm-up: {growth:.1f} MB")
+        return growth
+    finally:
+        main.yf, bars.yf = real_yf
+        main.CHAIN_ARCHIVE_ENABLED, main.SNAPSHOTS_ENABLED = real_archiving
+        outputs.close()
+
+
+if __name__ == "__main__":
+    growth = run_leak_check()
+    if growth > MAX_GROWTH_MB:
+        print(f"FAIL: memory grew by {growth:.1f} MB (limit {MAX_GROWTH_MB} MB)")
+        sys.exit(1)
+    print("OK")
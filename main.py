@@ -2,19 +2,73 @@ import yfinance as yf
 import numpy as np
 import pandas as pd
 import requests
+import os
 from datetime import datetime
-from scipy.stats import norm
+from functools import partial
 from bs4 import BeautifulSoup
 import time
 import gspread
 import warnings
+import logging
 from oauth2client.service_account import ServiceAccountCredentials
+from log_setup import setup_logging
+from scoring import CANDIDATES_TOP_N, MAX_PREMIUM, PROBABILITY_ITM, closest_option, rank_candidates, score_options
+from profiling import CycleProfiler
+from api import RecommendationCache, start_api_server
+from bars import BarBuffers
+from realized_vol import RealizedVolatility
+from batch_scoring import concat_chains, score_universe, select_best, top_candidates
+from chain_archive import ChainArchive
+from checkpoint import CycleCheckpoint
+from hedging import CallGuard
+from monte_carlo import ticker_seed
+from quotes import poll_quotes
+from portfolios import Portfolio, PortfolioSet, load_portfolio_config
+from universe import TickerUniverse
+from scheduling import CYCLE_DEADLINE_SECONDS, TickerPrioritizer
+from daemon import current_rss_mb, over_budget, recycle_process, release_cycle_state
+from retention import ARCHIVE_DIR, HistoryRetention
+from snapshots import append_snapshot
+from ticker_stats import TickerStatistics
+from sinks import CsvSink, FanOut, JsonLinesSink, ParquetSink, SheetsSink, StdoutSink
+from strategies import STRATEGIES_TOP_N, search_strategies
+from streaming import RecommendationStream, start_stream_server
 
 warnings.filterwarnings("ignore", category=FutureWarning)
 warnings.filterwarnings("ignore", category=RuntimeWarning)
 
-RISK_FREE_RATE = 0.01
+SPOT_MAX_AGE_SECONDS = 120
 STOCKS_FILE_PATH = "/Users/avisiebzener/git/stocks/sheets/stocks.txt"
+SHEET_KEY = "1XBIqcV1ky446ouQhheuwuNeGVOhtu7fKuM2gKmyEDQ0"
+OUTPUT_SINKS = ["sheets"]  # any of "sheets", "csv", "parquet", "jsonl", "stdout"
+OUTPUT_DIR = "output"
+STREAM_ENABLED = True
+API_ENABLED = True
+DAEMON_MODE = True
+CYCLE_INTERVAL_SECONDS = 600
+EVENT_DRIVEN = False  # re-analyze only tickers that moved or went stale, checked by a bulk quote poll
+# In event-driven mode a cycle is a CYCLE_INTERVAL_SECONDS window of quote polls, so retention,
+# archiving and checkpoints keep a wall-clock cadence however often tickers are analyzed.
+QUOTE_POLL_SECONDS = 60
+CANDIDATE_SINKS = ["csv"]
+STRATEGY_SINKS = ["csv"]
+SNAPSHOTS_ENABLED = False
+CHAIN_ARCHIVE_ENABLED = True
+SCORING_BATCH_SIZE = 50  # tickers scored together by analyze_batch; 1 scores each ticker on its own
+SCORING_BATCH_MAX_WAIT = 5.0  # seconds a partial batch waits for more chains before it is scored anyway
+HEADER = ["Ticker", "Current Price", "Recommended Option Type", "Recommended Option",
+          "Strike", "Premium", "Expiry", "Market Edge", "IV/RV", "Timestamp"]
+CANDIDATE_HEADER = ["Ticker", "Criterion", "Rank", "Current Price", "Option Type", "Option", "Strike",
+                    "Premium", "Expiry", "Market Edge", "Edge Per Dollar", "IV/RV", "Timestamp"]
+STRATEGY_HEADER = ["Ticker", "Strategy", "Rank", "Current Price", "Expiry", "Leg 1", "Strike 1", "Leg 2", "Strike 2",
+                   "Cost", "Expected Profit", "Probability of Profit", "Max Loss", "Max Gain", "Timestamp"]
+
+logger = logging.getLogger("main")
+realized_vol = RealizedVolatility()
+call_guard = CallGuard()
+bar_buffers = BarBuffers(guard=call_guard)
+chain_archive = ChainArchive()
+ticker_stats = TickerStatistics()
 
 
 def get_user_stocks(file_path=STOCKS_FILE_PATH):
@@ -24,185 +78,660 @@ def get_user_stocks(file_path=STOCKS_FILE_PATH):
     try:
         with open(file_path, 'r') as file:
             tickers = [line.strip() for line in file if line.strip()]
-        print(f"Loaded {len(tickers)} stocks from input file.")
+        logger.info("Loaded %d stocks from input file.", len(tickers))
         return tickers
     except FileNotFoundError:
-        print(f"Input file '{file_path}' not found.")
+        logger.error("Input file '%s' not found.", file_path)
         return []
 
 
 def fetch_stock_data(ticker):
-    try:
-        print(f"Fetching stock data for {ticker}...")
-        data = yf.download(ticker, period="1d", interval="1m", progress=False)
-        if data.empty:
-            print(f"No data available for {ticker}.")
-            return None
-        return data
-    except Exception as e:
-        print(f"Error fetching data for {ticker}: {e}")
-        return None
-
-
-def calculate_probability_ITM(S, K, T, r, sigma):
-    try:
-        d1 = (np.log(S / K) + (r + 0.5 * sigma ** 2) * T) / (sigma * np.sqrt(T))
-        return norm.cdf(d1)
-    except Exception as e:
-        print(f"Error calculating probability ITM: {e}")
-        return 0
+    """
+    Returns today's 1-minute bars for a ticker, downloading only the bars
+    newer than those already buffered.
+    """
+    return bar_buffers.fetch(ticker)
 
 
-def recommend_single_option(options_data, S, probability_ITM):
+def spot_from_quote(quote, max_age=SPOT_MAX_AGE_SECONDS, now=None):
+    """
+    Returns the underlying price carried in the option-chain quote, or None when
+    the quote is missing or too stale during regular hours to replace the last 1-minute close.
+    """
+    if not quote:
+        return None
     try:
-        otm_options = options_data[
-            ((options_data['optionType'] == 'call') & (options_data['strike'] > S)) |
-            ((options_data['optionType'] == 'put') & (options_data['strike'] < S))
-        ].copy()
-        
-        if otm_options.empty:
-            print("No out-of-the-money options found.")
+        price = float(quote.get('regularMarketPrice'))
+        if not price > 0:
             return None
-
-        otm_options['distance'] = abs(otm_options['strike'] - S)
-        otm_options['probability_ITM'] = otm_options.apply(
-            lambda row: calculate_probability_ITM(
-                S,
-                row['strike'],
-                14 / 365,
-                RISK_FREE_RATE,
-                row['impliedVolatility'] if 'impliedVolatility' in row and not pd.isna(row['impliedVolatility']) else 0.2
-            ),
-            axis=1
-        )
-        otm_options['edge'] = (otm_options['probability_ITM'] / probability_ITM - 1) * 100
-        
-        valid_options = otm_options[otm_options['edge'] > 0]
-        
-        if valid_options.empty:
-            print("No options with positive market edge found.")
-            return None
-        
-        best_option = valid_options.sort_values(by='distance').head(1)
-        return best_option.iloc[0] if not best_option.empty else None
-    except Exception as e:
-        print(f"Error recommending single option: {e}")
+        if quote.get('marketState', 'REGULAR') != 'REGULAR':
+            return price
+        now = time.time() if now is None else now
+        return price if now - float(quote['regularMarketTime']) <= max_age else None
+    except (KeyError, TypeError, ValueError):
         return None
 
 
-def analyze_stock(ticker, count, total):
+def fetch_chain(ticker, count, total, observations):
+    """
+    Fetches a ticker's option chains and spot price. Returns the combined
+    chain with premiums up to MAX_PREMIUM, the spot price and the realized
+    volatility, or None. `observations` receives the spot price and total
+    option volume, and under 'failed' the provider calls that errored or
+    timed out.
+    """
+    failed = observations.setdefault('failed', [])
     try:
-        print(f"\nAnalyzing {count} out of {total}: {ticker}...")
-        stock_data = fetch_stock_data(ticker)
-        if stock_data is None:
-            print(f"No data for {ticker}. Skipping analysis.")
-            return None
-        
-        current_price = float(stock_data['Close'].iloc[-1])
-        print(f"Current price for {ticker} is ${current_price:.2f}. Fetching options data...")
-
+        logger.debug("Analyzing %d out of %d: %s...", count, total, ticker)
         stock = yf.Ticker(ticker)
         try:
-            options_data = stock.options
+            options_data = call_guard.call("options", getattr, stock, "options")
             if not options_data:
-                print(f"No options data available for {ticker}. Skipping.")
+                logger.info("No options data available for %s. Skipping.", ticker)
                 return None
         except Exception as e:
-            print(f"Error fetching options for {ticker}: {e}")
+            logger.warning("Error fetching options for %s: %s", ticker, e)
+            failed.append("options")
             return None
+
+        current_price = spot_from_quote(getattr(stock, '_underlying', None))
+        if current_price is None or realized_vol.needs_refresh(ticker):
+            stock_data = fetch_stock_data(ticker)
+            if current_price is None and ticker in bar_buffers.failed:
+                failed.append("download")  # only when spot depended on the bars
+            if stock_data is not None:
+                realized_vol.update(ticker, stock_data)
+            if current_price is None:
+                if stock_data is None:
+                    logger.debug("No data for %s. Skipping analysis.", ticker)
+                    return None
+                current_price = float(stock_data['Close'].iloc[-1])
+        realized_sigma = realized_vol.sigma(ticker)
+        observations['spot'] = current_price
+        observations['realized_vol'] = realized_sigma
+        logger.debug("Current price for %s is $%.2f. Fetching options data...", ticker, current_price)
             
         all_options = []
         for option_expiration in options_data:
             try:
-                option_chain = stock.option_chain(option_expiration)
+                option_chain = call_guard.call("option_chain", stock.option_chain, option_expiration)
                 calls = option_chain.calls.assign(optionType='call', expiration=option_expiration)
                 puts = option_chain.puts.assign(optionType='put', expiration=option_expiration)
                 all_options.append(pd.concat([calls, puts]))
             except Exception as e:
-                print(f"Error fetching options chain for {ticker} on {option_expiration}: {e}")
+                logger.warning("Error fetching options chain for %s on %s: %s", ticker, option_expiration, e)
+                failed.append("option_chain")
                 continue
                 
         if not all_options:
-            print(f"No options chains could be fetched for {ticker}.")
+            logger.warning("No options chains could be fetched for %s.", ticker)
             return None
         
-        print(f"Fetched all options for {ticker}.")
+        logger.debug("Fetched all options for %s.", ticker)
         
         all_options_df = pd.concat(all_options, ignore_index=True)
-        all_options_df = all_options_df[all_options_df['lastPrice'] <= 250]
+        if SNAPSHOTS_ENABLED:
+            append_snapshot(ticker, all_options_df, current_price, realized_vol=realized_sigma)
+        if CHAIN_ARCHIVE_ENABLED:
+            chain_archive.append(ticker, all_options_df, current_price, realized_vol=realized_sigma)
+        if 'volume' in all_options_df:
+            observations['option_volume'] = float(all_options_df['volume'].fillna(0).sum())
+        all_options_df = all_options_df[all_options_df['lastPrice'] <= MAX_PREMIUM]
         
         if all_options_df.empty:
-            print(f"No suitable options found for {ticker}.")
+            logger.info("No suitable options found for %s.", ticker)
             return None
 
         if 'impliedVolatility' not in all_options_df:
-            all_options_df['impliedVolatility'] = 0.2
+            all_options_df['impliedVolatility'] = realized_sigma or 0.2
+        return all_options_df, current_price, realized_sigma
+    except Exception as e:
+        logger.error("An error occurred while analyzing %s: %s", ticker, e)
+        return None
 
-        probability_ITM = 0.5
-        option = recommend_single_option(all_options_df, current_price, probability_ITM)
-        
+
+def analyze_stock(ticker, count, total, observations=None):
+    """
+    Fetches the option chains for a ticker and returns its recommendation, or
+    None. If an observations dict is passed, it receives what fetch_chain
+    records even when nothing is recommended.
+    """
+    if observations is None:
+        observations = {}
+    fetched = fetch_chain(ticker, count, total, observations)
+    if fetched is None:
+        return None
+    return score_chain(ticker, count, total, fetched, observations)
+
+
+def score_chain(ticker, count, total, fetched, observations):
+    """
+    Scores one ticker's fetch_chain result on its own and returns its
+    recommendation, or None. `observations` receives its candidates and
+    strategies.
+    """
+    all_options_df, current_price, realized_sigma = fetched
+    try:
+        valid_options = score_options(all_options_df, current_price, PROBABILITY_ITM, realized_sigma,
+                                      seed=ticker_seed(ticker))
+        option = closest_option(valid_options)
+        if CANDIDATES_TOP_N:
+            observations['candidates'] = candidate_records(ticker, current_price, rank_candidates(valid_options))
+        if STRATEGIES_TOP_N:
+            find_strategies(ticker, fetched, observations)
         if option is not None:
-            contract_symbol = option['contractSymbol']
-            last_price_real_time = option['lastPrice']
-            edge = option['edge']
-            
-            itm_otm = "ITM" if (option['strike'] < current_price if option['optionType'] == 'call' else option['strike'] > current_price) else "OTM"
-            option_type = f"{itm_otm} {option['optionType'].upper()}"
-            print(f"\nFound recommended option for {ticker}")
-            print(f"Current Price: ${current_price:.2f}")
-            print(f"{option_type}: {contract_symbol}")
-            print(f"Strike: ${option['strike']:.2f} ({abs(((option['strike'] - current_price) / current_price) * 100):.1f}% {itm_otm})")
-            print(f"Premium: ${last_price_real_time:.2f}")
-            print(f"Expiry: {option['expiration']}")
-            print(f"Market Edge: {edge:.2f}")
-            print("________________________")
-                
-            return {
-                "Ticker": ticker,
-                "Current Price": current_price,
-                "Recommended Option Type": option_type,
-                "Recommended Option": contract_symbol,
-                "Strike": option['strike'],
-                "Premium": last_price_real_time,
-                "Expiry": option['expiration'],
-                "Market Edge": edge
-            }
-        else:
-            print(f"No recommended option found for {ticker}.")
-            return None
+            return recommendation_record(ticker, option, current_price, count, total)
+        logger.info("No recommended option found for %s.", ticker)
+        return None
     except Exception as e:
-        print(f"An error occurred while analyzing {ticker}: {e}")
+        logger.error("An error occurred while analyzing %s: %s", ticker, e)
         return None
 
 
-def main():
-    tickers = get_user_stocks()
+def analyze_batch(fetched, total):
+    """
+    Scores the chains of many tickers in one pass and returns their
+    recommendations in order. `fetched` holds (ticker, count, fetch_chain
+    result, observations) tuples. Gives the same records, candidates and
+    strategies as score_chain, scoring every chain in one vectorized pass;
+    strategies are still searched per ticker by find_strategies.
+    batch_check.py compares the two.
+    """
+    chains = [entry for entry in fetched if entry[2] is not None]
+    if not chains:
+        return [None] * len(fetched)
+    try:
+        columns = concat_chains([result for _, _, result, _ in chains])
+        scored = score_universe(columns, seeds=[ticker_seed(ticker) for ticker, _, _, _ in chains])
+        best = select_best(scored)
+        candidates = top_candidates(scored) if CANDIDATES_TOP_N else []
+    except Exception as e:
+        logger.error("An error occurred while scoring a batch of %d tickers: %s", len(chains), e)
+        return [None] * len(fetched)
+    fields = [{name: result[0][name].to_numpy() for name in ('contractSymbol', 'optionType', 'expiration')}
+              for _, _, result, _ in chains]
+    with np.errstate(divide='ignore', invalid='ignore'):
+        edge_per_dollar = np.where(scored['last_price'] > 0, scored['edge'] / scored['last_price'], np.nan)
+
+    def option_at(position):
+        key = int(scored['key'][position])
+        row = int(scored['row'][position])
+        option = {name: values[row - columns['offset'][key]] for name, values in fields[key].items()}
+        option.update(strike=columns['strike'][row], lastPrice=scored['last_price'][position],
+                      edge=scored['edge'][position], edge_per_dollar=edge_per_dollar[position])
+        if not np.isnan(columns['realized_vol'][row]):
+            option['iv_rv'] = scored['iv_rv'][position]
+        return key, option
+
+    if CANDIDATES_TOP_N:
+        for _, _, _, observations in chains:
+            observations['candidates'] = []
+        for criterion, positions, ranks in candidates:
+            for position, rank in zip(positions.tolist(), ranks.tolist()):
+                key, option = option_at(position)
+                ticker, _, result, observations = chains[key]
+                observations['candidates'].append(candidate_record(ticker, result[1],
+                                                                   dict(option, criterion=criterion, rank=rank)))
+    if STRATEGIES_TOP_N:
+        for ticker, _, result, observations in chains:
+            find_strategies(ticker, result, observations)
+    recommendations = [None] * len(chains)
+    for position in best.tolist():
+        key, option = option_at(position)
+        ticker, count, result, _ = chains[key]
+        recommendations[key] = recommendation_record(ticker, option, result[1], count, total)
+    for (ticker, _, _, _), recommendation in zip(chains, recommendations):
+        if recommendation is None:
+            logger.info("No recommended option found for %s.", ticker)
+    by_ticker = {entry[0]: recommendation for entry, recommendation in zip(chains, recommendations)}
+    return [by_ticker.get(ticker) for ticker, _, _, _ in fetched]
+
+
+def recommendation_record(ticker, option, current_price, count, total):
+    """
+    Logs the recommended option and returns it as an output row.
+    """
+    contract_symbol = option['contractSymbol']
+    last_price_real_time = option['lastPrice']
+    edge = option['edge']
+
+    itm_otm = "ITM" if (option['strike'] < current_price if option['optionType'] == 'call' else option['strike'] > current_price) else "OTM"
+    option_type = f"{itm_otm} {option['optionType'].upper()}"
+    logger.info(
+        "%s %d/%d: $%.2f, %s %s strike $%.2f (%.1f%% %s) premium $%.2f expiry %s edge %.2f",
+        ticker, count, total, current_price, option_type, contract_symbol, option['strike'],
+        abs(((option['strike'] - current_price) / current_price) * 100), itm_otm,
+        last_price_real_time, option['expiration'], edge,
+        extra={"ticker": ticker, "contract": contract_symbol, "edge": float(edge)}
+    )
+
+    return {
+        "Ticker": ticker,
+        "Current Price": current_price,
+        "Recommended Option Type": option_type,
+        "Recommended Option": contract_symbol,
+        "Strike": option['strike'],
+        "Premium": last_price_real_time,
+        "Expiry": option['expiration'],
+        "Market Edge": edge,
+        "IV/RV": option['iv_rv'] if 'iv_rv' in option else ""
+    }
+
+
+def candidate_record(ticker, current_price, option):
+    return {
+        "Ticker": ticker,
+        "Criterion": option['criterion'],
+        "Rank": int(option['rank']),
+        "Current Price": current_price,
+        "Option Type": option['optionType'].upper(),
+        "Option": option['contractSymbol'],
+        "Strike": option['strike'],
+        "Premium": option['lastPrice'],
+        "Expiry": option['expiration'],
+        "Market Edge": option['edge'],
+        "Edge Per Dollar": option['edge_per_dollar'],
+        "IV/RV": option.get('iv_rv', ""),
+    }
+
+
+def candidate_records(ticker, current_price, candidates):
+    """
+    Turns a rank_candidates table into rows for the candidate outputs.
+    """
+    return [candidate_record(ticker, current_price, option) for option in candidates.to_dict('records')]
+
+
+def strategy_record(ticker, current_price, strategy):
+    return {
+        "Ticker": ticker,
+        "Strategy": strategy['strategy'],
+        "Rank": int(strategy['rank']),
+        "Current Price": current_price,
+        "Expiry": strategy['expiration'],
+        "Leg 1": strategy['leg1_symbol'],
+        "Strike 1": strategy['leg1_strike'],
+        "Leg 2": strategy['leg2_symbol'],
+        "Strike 2": strategy['leg2_strike'],
+        "Cost": strategy['cost'],
+        "Expected Profit": strategy['expected_profit'],
+        "Probability of Profit": strategy['probability_profit'],
+        "Max Loss": strategy['max_loss'],
+        "Max Gain": strategy['max_gain'] if np.isfinite(strategy['max_gain']) else "",
+    }
+
+
+def find_strategies(ticker, fetched, observations):
+    """
+    Searches a fetch_chain result for vertical spreads and strangles and
+    stores their output rows under observations['strategies'].
+    """
+    all_options_df, current_price, realized_sigma = fetched
+    try:
+        strategies = search_strategies(all_options_df, current_price, realized_sigma)
+        observations['strategies'] = [strategy_record(ticker, current_price, strategy)
+                                      for strategy in strategies.to_dict('records')]
+    except Exception as e:
+        logger.warning("Error searching strategies for %s: %s", ticker, e)
+
+
+def get_or_create_worksheet(spreadsheet, title, header):
+    try:
+        return spreadsheet.worksheet(title)
+    except gspread.exceptions.WorksheetNotFound:
+        worksheet = spreadsheet.add_worksheet(title=title, rows=1000, cols=len(header))
+        worksheet.append_row(header)
+        return worksheet
+
+
+def build_sinks(names, sheet=None, spreadsheet=None, retention=None, output_dir=OUTPUT_DIR,
+                fields=HEADER, basename="recommendations"):
+    """
+    Creates the output sinks named in OUTPUT_SINKS, CANDIDATE_SINKS or STRATEGY_SINKS.
+    """
+    if any(name != "sheets" and name != "stdout" for name in names):
+        os.makedirs(output_dir, exist_ok=True)
+    sinks = []
+    for name in names:
+        try:
+            if name == "sheets":
+                sinks.append(SheetsSink(sheet, fields, spreadsheet, retention))
+            elif name == "csv":
+                sinks.append(CsvSink(os.path.join(output_dir, f"{basename}.csv"), fields))
+            elif name == "parquet":
+                sinks.append(ParquetSink(os.path.join(output_dir, basename)))
+            elif name == "jsonl":
+                sinks.append(JsonLinesSink(os.path.join(output_dir, f"{basename}.jsonl")))
+            elif name == "stdout":
+                sinks.append(StdoutSink(fields))
+            else:
+                logger.warning("Unknown output sink '%s', ignoring.", name)
+        except ImportError as e:
+            logger.warning("Output sink '%s' is unavailable: %s", name, e)
+    return sinks
+
+
+def run_cycle(tickers, outputs, stream, prioritizer=None, deadline_seconds=None, candidate_outputs=None,
+              cache=None, checkpoint=None, completed=None, retry_failures=True, batch_size=SCORING_BATCH_SIZE,
+              strategy_outputs=None, schedule=True, end_cycle=True, batch_wait=SCORING_BATCH_MAX_WAIT):
+    """
+    Analyzes tickers highest-priority first, publishing and submitting every
+    recommendation as soon as it is computed. Stops starting new tickers once
+    the deadline passes and defers the rest to the front of the next cycle.
+    Tickers in `completed` (results recovered from an interrupted cycle) are
+    not fetched again. Tickers whose provider calls failed are held back and
+    analyzed once more at the end of the cycle, keeping the first result if
+    the retry fails too or the deadline has passed. With a batch_size above
+    1, chains are fetched one ticker at a time but scored batch_size tickers
+    at a time, or sooner once the oldest unscored chain has waited
+    batch_wait seconds, so results keep flowing when fetches are slow. With
+    schedule off, tickers run in the given order and the
+    prioritizer's carry-over is left alone; with end_cycle off, the outputs
+    are not told a cycle ended, so retention does not count the run. Returns
+    the number of recommendations and the number of tickers analyzed.
+    """
+    completed = completed or {}
     total_stocks = len(tickers)
+    if prioritizer is not None and schedule:
+        tickers = prioritizer.order(tickers)
+    deadline = time.monotonic() + deadline_seconds if deadline_seconds else None
+    recommended = 0
+    analyzed = 0
+    retries = []
+
+    def finish(ticker, stock_info, observations):
+        if cache is not None:
+            cache.put(ticker, stock_info)
+        if prioritizer is not None:
+            prioritizer.observe(ticker, stock_info, observations)
+        if candidate_outputs is not None and observations.get('candidates'):
+            timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+            candidate_outputs.submit([dict(record, Timestamp=timestamp) for record in observations['candidates']])
+        if strategy_outputs is not None and observations.get('strategies'):
+            timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+            strategy_outputs.submit([dict(record, Timestamp=timestamp) for record in observations['strategies']])
+        journal = None if checkpoint is None else partial(checkpoint.record, ticker, stock_info, checkpoint.cycle)
+        if stock_info:
+            stock_info["Timestamp"] = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+            stream.publish(stock_info)
+            outputs.submit([stock_info], on_written=journal)
+        else:
+            stream.clear(ticker)
+            if journal is not None:
+                journal()
+        ticker_stats.observe(ticker, stock_info, observations.get('spot'))
+        return 1 if stock_info else 0
+
+    def settle(ticker, stock_info, observations):
+        if retry_failures and observations['failed']:
+            retries.append((ticker, stock_info, observations))
+            return 0
+        return finish(ticker, stock_info, observations)
+
+    batch = []
+    for count, ticker in enumerate(tickers, start=1):
+        if deadline is not None and time.monotonic() >= deadline:
+            logger.warning("Cycle deadline reached after %d of %d tickers; deferring the rest.", analyzed, total_stocks)
+            if prioritizer is not None and schedule:
+                prioritizer.defer(tickers[analyzed:])
+            break
+        if ticker in completed:
+            stock_info = completed[ticker]
+            analyzed += 1
+            if cache is not None:
+                cache.put(ticker, stock_info)
+            if stock_info:
+                recommended += 1
+                stream.publish(stock_info)
+            else:
+                stream.clear(ticker)
+            continue
+        observations = {}
+        analyzed += 1
+        if batch_size > 1:
+            if not batch:
+                batch_started = time.monotonic()
+            batch.append((ticker, count, fetch_chain(ticker, count, total_stocks, observations), observations))
+            if len(batch) >= batch_size or time.monotonic() - batch_started >= batch_wait:
+                for entry, stock_info in zip(batch, analyze_batch(batch, total_stocks)):
+                    recommended += settle(entry[0], stock_info, entry[3])
+                batch = []
+            continue
+        stock_info = analyze_stock(ticker, count, total_stocks, observations)
+        recommended += settle(ticker, stock_info, observations)
+    for entry, stock_info in zip(batch, analyze_batch(batch, total_stocks)):
+        recommended += settle(entry[0], stock_info, entry[3])
+    if retries:
+        logger.info("Retrying %d tickers with failed provider calls.", len(retries))
+    for count, (ticker, stock_info, observations) in enumerate(retries, start=1):
+        if deadline is None or time.monotonic() < deadline:
+            retry_observations = {}
+            retry_info = analyze_stock(ticker, count, len(retries), retry_observations)
+            if not retry_observations['failed'] or stock_info is None:
+                stock_info, observations = retry_info, retry_observations
+            if retry_observations['failed']:
+                logger.warning("Provider calls for %s failed again on retry (%s).", ticker,
+                               ", ".join(sorted(set(retry_observations['failed']))))
+        recommended += finish(ticker, stock_info, observations)
+    if end_cycle:
+        end_output_cycle(outputs, candidate_outputs, strategy_outputs)
+    return recommended, analyzed
+
+
+def end_output_cycle(*outputs):
+    """
+    Tells each of the given outputs that a cycle ended, skipping None.
+    """
+    for output in outputs:
+        if output is not None:
+            output.end_cycle()
+
+
+def analyze_on_demand(ticker):
+    """
+    Analyzes a ticker requested through the API that the cache does not hold.
+    """
+    stock_info = analyze_stock(ticker, 1, 1)
+    if stock_info:
+        stock_info["Timestamp"] = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    return stock_info
+
+
+def build_portfolios(client, fresh, saved_rows=None):
+    """
+    Opens the spreadsheet and outputs of every portfolio in the portfolios
+    config, or of the single STOCKS_FILE_PATH/SHEET_KEY portfolio without
+    one. On a fresh start each sheet is cleared and given the header;
+    otherwise each portfolio's retention resumes from its saved row counts.
+    Returns the PortfolioSet and the first portfolio's spreadsheet.
+    """
+    configs = load_portfolio_config() or [{"name": "default", "stocks_file": STOCKS_FILE_PATH,
+                                           "sheet_key": SHEET_KEY}]
+    if isinstance(saved_rows, list):
+        saved_rows = {configs[0]['name']: saved_rows}
+    saved_rows = saved_rows or {}
+    single = len(configs) == 1
+    portfolios = []
+    spreadsheets = []
+    for config in configs:
+        name = config['name']
+        spreadsheet = client.open_by_key(config['sheet_key'])
+        sheet = spreadsheet.sheet1
+        if fresh:
+            sheet.clear()
+            sheet.append_row(HEADER)
+        retention = HistoryRetention(archive_dir=ARCHIVE_DIR if single else os.path.join(ARCHIVE_DIR, name))
+        retention.cycle_rows.extend(saved_rows.get(name, []))
+        output_dir = OUTPUT_DIR if single else os.path.join(OUTPUT_DIR, name)
+        outputs = FanOut(build_sinks(config.get('sinks', OUTPUT_SINKS), sheet, spreadsheet, retention, output_dir))
+        universe = TickerUniverse(config['stocks_file'], get_user_stocks)
+        portfolios.append(Portfolio(name, universe, outputs, retention, config.get('filters')))
+        spreadsheets.append(spreadsheet)
+    return PortfolioSet(portfolios), spreadsheets[0]
+
+
+def main():
+    setup_logging()
     
     scope = ["https://spreadsheets.google.com/feeds", "https://www.googleapis.com/auth/spreadsheets",
              "https://www.googleapis.com/auth/drive.file", "https://www.googleapis.com/auth/drive"]
     creds = ServiceAccountCredentials.from_json_keyfile_name("credentials.json", scope)
     client = gspread.authorize(creds)
-    sheet = client.open_by_key("1XBIqcV1ky446ouQhheuwuNeGVOhtu7fKuM2gKmyEDQ0").sheet1
 
-    sheet.clear()
-    header = ["Ticker", "Current Price", "Recommended Option Type", "Recommended Option",
-              "Strike", "Premium", "Expiry", "Market Edge", "Timestamp"]
-    sheet.append_row(header)
+    checkpoint = CycleCheckpoint()
+    state = checkpoint.load_state()
+    resume = checkpoint.in_flight() if state is not None else None
+    portfolios, spreadsheet = build_portfolios(client, state is None, state and state.get('retention_rows'))
+    if state is None:
+        cycle = 0
+        checkpoint.save_state(cycle)
+    else:
+        cycle = state['last_completed_cycle']
+        if resume and resume['expired']:
+            detail = f", re-analyzing the {len(resume['completed'])} tickers of expired cycle {resume['cycle']}"
+        elif resume:
+            detail = f", {len(resume['completed'])} tickers of cycle {resume['cycle']} already done"
+        else:
+            detail = ""
+        logger.info("Resuming after cycle %d without clearing the sheets%s.", cycle, detail)
+    candidate_sheet = None
+    if "sheets" in CANDIDATE_SINKS:
+        candidate_sheet = get_or_create_worksheet(spreadsheet, "Candidates", CANDIDATE_HEADER)
+    candidate_outputs = FanOut(build_sinks(CANDIDATE_SINKS, candidate_sheet, fields=CANDIDATE_HEADER,
+                                           basename="candidates"))
+    strategy_sheet = None
+    if "sheets" in STRATEGY_SINKS:
+        strategy_sheet = get_or_create_worksheet(spreadsheet, "Strategies", STRATEGY_HEADER)
+    strategy_outputs = FanOut(build_sinks(STRATEGY_SINKS, strategy_sheet, fields=STRATEGY_HEADER,
+                                          basename="strategies"))
+    stream = RecommendationStream()
+    if STREAM_ENABLED:
+        start_stream_server(stream)
+    cache = RecommendationCache()
+    if API_ENABLED:
+        start_api_server(cache, analyze_on_demand)
+    profiler = CycleProfiler()
+    ticker_stats.load()
+    prioritizer = TickerPrioritizer()
+
+    def forget(removed):
+        logger.info("Dropping %d removed tickers from the stream and API cache.", len(removed))
+        for ticker in removed:
+            stream.clear(ticker)
+            cache.evict(ticker)
+
+    def idle(seconds):
+        next_cycle = time.monotonic() + seconds
+        while True:
+            added = portfolios.wait(next_cycle - time.monotonic(), on_removed=forget)
+            if not added:
+                break
+            logger.info("Analyzing %d newly added tickers now.", len(added))
+            run_cycle(added, portfolios, stream, prioritizer, None, candidate_outputs, cache,
+                      strategy_outputs=strategy_outputs, schedule=False, end_cycle=False)
+
+    def event_window():
+        """
+        Polls quotes every QUOTE_POLL_SECONDS for CYCLE_INTERVAL_SECONDS and
+        analyzes the tickers due at each poll. The outputs see one cycle
+        for the whole window. Returns the due, recommended and analyzed
+        counts summed over its polls.
+        """
+        window_end = time.monotonic() + CYCLE_INTERVAL_SECONDS
+        due_total = recommended = analyzed = 0
+        while True:
+            tickers = portfolios.tickers
+            spots = {ticker: spot_from_quote(quote) for ticker, quote in
+                     poll_quotes(tickers, guard=call_guard).items()}
+            due = prioritizer.due(tickers, {ticker: spot for ticker, spot in spots.items() if spot is not None})
+            if due:
+                logger.info("%d of %d tickers moved or went stale (%d quoted).", len(due), len(tickers), len(spots))
+                poll_recommended, poll_analyzed = run_cycle(due, portfolios, stream, prioritizer,
+                                                            CYCLE_DEADLINE_SECONDS, candidate_outputs, cache,
+                                                            checkpoint, strategy_outputs=strategy_outputs,
+                                                            end_cycle=False)
+                due_total += len(due)
+                recommended += poll_recommended
+                analyzed += poll_analyzed
+            else:
+                logger.debug("No ticker of %d moved or went stale.", len(tickers))
+            remaining = window_end - time.monotonic()
+            if remaining <= 0:
+                break
+            idle(min(QUOTE_POLL_SECONDS, remaining))
+        end_output_cycle(portfolios, candidate_outputs, strategy_outputs)
+        return due_total, recommended, analyzed
 
     while True:
-        print("\nStarting analysis for stocks from input file...")
+        _, removed = portfolios.poll()
+        if removed:
+            forget(removed)
+        tickers = portfolios.tickers
+        cycle += 1
+        cycle_start = time.perf_counter()
+        resuming = resume is not None and resume['cycle'] == cycle
+        if resuming:
+            # Rows of the interrupted cycle are in the sheets either way, so retention counts them.
+            portfolios.resume_cycle([record for record in resume['completed'].values() if record])
+            resuming = not resume['expired']
+        completed = resume['completed'] if resuming else None
+        resume = None
+        windowed = EVENT_DRIVEN and not resuming
+        if windowed:
+            logger.info("Starting event-driven cycle %d, polling %d unique stocks across %d portfolios for "
+                        "%d minutes...", cycle, len(tickers), len(portfolios.portfolios),
+                        CYCLE_INTERVAL_SECONDS // 60)
+        else:
+            logger.info("Starting analysis cycle %d for %d unique stocks across %d portfolios...", cycle,
+                        len(tickers), len(portfolios.portfolios))
         
-        for count, ticker in enumerate(tickers, start=1):
-            stock_info = analyze_stock(ticker, count, total_stocks)
-            if stock_info:
-                timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-                row_data = list(stock_info.values()) + [timestamp]
-                sheet.append_row(row_data)
+        checkpoint.begin(cycle, resume=resuming)
+        with profiler.profile_cycle(cycle):
+            if windowed:
+                total_stocks, recommended, analyzed = event_window()
+            else:
+                total_stocks = len(tickers)
+                recommended, analyzed = run_cycle(tickers, portfolios, stream, prioritizer, CYCLE_DEADLINE_SECONDS,
+                                                 candidate_outputs, cache, checkpoint, completed,
+                                                 strategy_outputs=strategy_outputs)
+        portfolios.flush()
+        checkpoint.finish(cycle, retention_rows=portfolios.retention_rows())
         
-        print("\nCompleted analysis cycle.")
-        print("Waiting 5 minutes before the next check...")
-        time.sleep(600)
+        bar_buffers.save()
+        ticker_stats.save()
+        bars_downloaded = bar_buffers.take_download_count()
+        release_cycle_state()
+        duration = time.perf_counter() - cycle_start
+        rss_mb = current_rss_mb()
+        logger.info(
+            "cycle=%d tickers=%d analyzed=%d recommended=%d none=%d deferred=%d bars=%d duration=%.1fs rss=%.0fMB",
+            cycle, total_stocks, analyzed, recommended, analyzed - recommended, total_stocks - analyzed,
+            bars_downloaded, duration, rss_mb,
+            extra={"cycle": cycle, "tickers": total_stocks, "analyzed": analyzed, "recommended": recommended,
+                   "bars_downloaded": bars_downloaded, "duration_s": round(duration, 3), "rss_mb": round(rss_mb, 1)}
+        )
+        for line in portfolios.latency_report():
+            logger.info("Sink flush latency - %s", line)
+        for line in call_guard.latency_report():
+            logger.info("Provider call latency - %s", line)
+        stats_lines = ticker_stats.report()
+        logger.info("Ticker statistics - %s", stats_lines[0], extra={"ticker_stats": ticker_stats.metrics()})
+        for line in stats_lines[1:]:
+            logger.info("Ticker statistics - %s", line)
+        if not DAEMON_MODE:
+            portfolios.close()
+            candidate_outputs.close()
+            strategy_outputs.close()
+            return
+        if over_budget(rss_mb):
+            portfolios.close()
+            candidate_outputs.close()
+            strategy_outputs.close()
+            recycle_process()
+        if EVENT_DRIVEN:
+            continue
+        logger.info("Waiting %d minutes before the next check...", CYCLE_INTERVAL_SECONDS // 60)
+        idle(CYCLE_INTERVAL_SECONDS)
 
 
 if __name__ == "__main__":
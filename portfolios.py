@@ -0,0 +1,145 @@
+import json
+import logging
+import time
+
+from sinks import Acknowledgement
+
+PORTFOLIOS_CONFIG = "portfolios.json"
+WATCH_INTERVAL_SECONDS = 5
+
+logger = logging.getLogger(__name__)
+
+
+def load_portfolio_config(path=PORTFOLIOS_CONFIG):
+    """
+    Reads a JSON list of portfolios, each with "name", "stocks_file" and
+    "sheet_key" plus optional "sinks" and "filters". Returns None if the file
+    does not exist.
+    """
+    try:
+        with open(path) as file:
+            portfolios = json.load(file)
+    except FileNotFoundError:
+        return None
+    names = [portfolio['name'] for portfolio in portfolios]
+    if len(set(names)) != len(names):
+        raise ValueError(f"Duplicate portfolio names in {path}: {names}")
+    return portfolios
+
+
+class Portfolio:
+    """
+    One watchlist: its ticker universe, its outputs and the filters a
+    recommendation must pass to reach them. Supported filters are
+    "min_edge", "max_premium" and "option_types" (e.g. ["CALL"]).
+    """
+
+    def __init__(self, name, universe, outputs, retention=None, filters=None):
+        self.name = name
+        self.universe = universe
+        self.outputs = outputs
+        self.retention = retention
+        self.filters = filters or {}
+        self.members = set(universe.tickers)
+
+    def accepts(self, record):
+        if record["Ticker"] not in self.members:
+            return False
+        filters = self.filters
+        if "min_edge" in filters and float(record["Market Edge"]) < filters["min_edge"]:
+            return False
+        if "max_premium" in filters and float(record["Premium"]) > filters["max_premium"]:
+            return False
+        if "option_types" in filters:
+            kind = record["Recommended Option Type"].split()[-1]
+            if kind not in {option_type.upper() for option_type in filters["option_types"]}:
+                return False
+        return True
+
+
+class PortfolioSet:
+    """
+    Several portfolios analyzed as one deduplicated ticker universe. Offers
+    the TickerUniverse polling interface over the union and the FanOut
+    interface for results, routing each recommendation to every portfolio
+    that holds the ticker and whose filters it passes.
+    """
+
+    def __init__(self, portfolios):
+        self.portfolios = portfolios
+
+    @property
+    def tickers(self):
+        return list(dict.fromkeys(ticker for portfolio in self.portfolios for ticker in portfolio.universe.tickers))
+
+    def poll(self):
+        """
+        Polls every portfolio's stocks file and returns the (added, removed)
+        tickers of the union.
+        """
+        before = self.tickers
+        for portfolio in self.portfolios:
+            portfolio.universe.poll()
+            portfolio.members = set(portfolio.universe.tickers)
+        after = self.tickers
+        current, kept = set(before), set(after)
+        return [ticker for ticker in after if ticker not in current], [ticker for ticker in before if ticker not in kept]
+
+    def wait(self, seconds, watch_interval=WATCH_INTERVAL_SECONDS, on_removed=None):
+        """
+        Sleeps up to `seconds`, polling every watch_interval, and returns
+        early with the newly added tickers as soon as any portfolio gains
+        some. Removed tickers are passed to on_removed as they are seen.
+        """
+        deadline = time.monotonic() + seconds
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return []
+            time.sleep(min(watch_interval, remaining))
+            added, removed = self.poll()
+            if removed and on_removed is not None:
+                on_removed(removed)
+            if added:
+                return added
+
+    def _routes(self, records):
+        routes = []
+        for portfolio in self.portfolios:
+            accepted = [record for record in records if portfolio.accepts(record)]
+            if accepted:
+                routes.append((portfolio, accepted))
+        return routes
+
+    def submit(self, records, on_written=None):
+        routes = self._routes(records)
+        acknowledgement = None if on_written is None else Acknowledgement(len(routes), on_written)
+        for portfolio, accepted in routes:
+            portfolio.outputs.submit(accepted, None if acknowledgement is None else acknowledgement.done)
+
+    def end_cycle(self):
+        for portfolio in self.portfolios:
+            portfolio.outputs.end_cycle()
+
+    def resume_cycle(self, records):
+        """
+        Tells each portfolio's outputs which of the journaled records of an
+        interrupted cycle it had already written, so retention counts them.
+        """
+        for portfolio, accepted in self._routes(records):
+            portfolio.outputs.resume_cycle(accepted)
+
+    def flush(self, timeout=None):
+        return all([portfolio.outputs.flush(timeout) for portfolio in self.portfolios])
+
+    def close(self, timeout=None):
+        for portfolio in self.portfolios:
+            portfolio.outputs.close(timeout)
+
+    def latency_report(self):
+        return [f"[{portfolio.name}] {line}" for portfolio in self.portfolios
+                for line in portfolio.outputs.latency_report()]
+
+    def retention_rows(self):
+        return {portfolio.name: list(portfolio.retention.cycle_rows)
+                for portfolio in self.portfolios if portfolio.retention is not None}
@@ -0,0 +1,106 @@
+import cProfile
+import io
+import logging
+import os
+import pstats
+import time
+import tracemalloc
+from contextlib import contextmanager
+
+PROFILE_EVERY_N_CYCLES = 0  # 0 disables profiling
+PROFILE_DIR = "profiles"
+PROFILE_TOP_N = 25
+TRACEMALLOC_FRAMES = 1
+
+logger = logging.getLogger(__name__)
+
+
+def _function_label(key):
+    filename, line, name = key
+    return f"{os.path.basename(filename)}:{line}({name})"
+
+
+class CycleProfiler:
+    """
+    Wraps every Nth analysis cycle in cProfile and tracemalloc and writes a
+    report with the top functions, top allocation sites and the change in
+    both since the previous profiled cycle. Unsampled cycles run untouched.
+    """
+
+    def __init__(self, every_n=PROFILE_EVERY_N_CYCLES, report_dir=PROFILE_DIR, top_n=PROFILE_TOP_N):
+        self.every_n = every_n
+        self.report_dir = report_dir
+        self.top_n = top_n
+        self.previous_times = None
+        self.previous_snapshot = None
+        self.previous_cycle = None
+
+    def should_profile(self, cycle):
+        return self.every_n > 0 and cycle % self.every_n == 0
+
+    @contextmanager
+    def profile_cycle(self, cycle):
+        if not self.should_profile(cycle):
+            yield
+            return
+        started_tracing = not tracemalloc.is_tracing()
+        if started_tracing:
+            tracemalloc.start(TRACEMALLOC_FRAMES)
+        profiler = cProfile.Profile()
+        start = time.perf_counter()
+        profiler.enable()
+        try:
+            yield
+        finally:
+            profiler.disable()
+            elapsed = time.perf_counter() - start
+            snapshot = tracemalloc.take_snapshot().filter_traces((
+                tracemalloc.Filter(False, tracemalloc.__file__),
+                tracemalloc.Filter(False, __file__),
+                tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+            ))
+            if started_tracing:
+                tracemalloc.stop()
+            try:
+                path = self.write_report(cycle, elapsed, profiler, snapshot)
+                logger.info("Wrote profile for cycle %d to %s", cycle, path)
+            except Exception as e:
+                logger.error("Error writing profile for cycle %d: %s", cycle, e)
+
+    def write_report(self, cycle, elapsed, profiler, snapshot):
+        os.makedirs(self.report_dir, exist_ok=True)
+        base = os.path.join(self.report_dir, f"cycle-{cycle:06d}")
+        profiler.dump_stats(f"{base}.prof")
+
+        out = io.StringIO()
+        out.write(f"Cycle {cycle} profiled in {elapsed:.2f}s\n\n")
+        out.write(f"== Top {self.top_n} functions by cumulative time ==\n")
+        stats = pstats.Stats(profiler, stream=out)
+        stats.sort_stats("cumulative").print_stats(self.top_n)
+
+        out.write(f"== Top {self.top_n} allocation sites ==\n")
+        for stat in snapshot.statistics("lineno")[:self.top_n]:
+            out.write(f"{stat}\n")
+
+        times = {key: value[2] for key, value in stats.stats.items()}
+        if self.previous_times is not None:
+            out.write(f"\n== Function self-time change since cycle {self.previous_cycle} ==\n")
+            keys = set(times) | set(self.previous_times)
+            deltas = sorted(
+                ((times.get(key, 0.0) - self.previous_times.get(key, 0.0), key) for key in keys),
+                key=lambda item: abs(item[0]), reverse=True
+            )
+            for delta, key in deltas[:self.top_n]:
+                out.write(f"{delta * 1000:+10.1f} ms  {_function_label(key)}\n")
+
+        if self.previous_snapshot is not None:
+            out.write(f"\n== Allocation change since cycle {self.previous_cycle} ==\n")
+            for stat in snapshot.compare_to(self.previous_snapshot, "lineno")[:self.top_n]:
+                out.write(f"{stat}\n")
+
+        with open(f"{base}.txt", 'w') as file:
+            file.write(out.getvalue())
+        self.previous_times = times
+        self.previous_snapshot = snapshot
+        self.previous_cycle = cycle
+        return f"{base}.txt"
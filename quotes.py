@@ -0,0 +1,37 @@
+import logging
+
+from yfinance.const import _BASE_URL_
+from yfinance.data import YfData
+
+QUOTE_URL = f"{_BASE_URL_}/v7/finance/quote"
+QUOTE_FIELDS = "regularMarketPrice,regularMarketTime,marketState"
+QUOTE_BATCH_SIZE = 200  # symbols per quote request
+
+logger = logging.getLogger(__name__)
+
+
+def yahoo_quotes(symbols):
+    """
+    Returns {symbol: quote} from one Yahoo quote request for many symbols,
+    each quote shaped like the `_underlying` of an option-chain response.
+    Uses yfinance's session so the cookie and crumb are shared with it.
+    """
+    data = YfData().get_raw_json(QUOTE_URL, params={"symbols": ",".join(symbols), "fields": QUOTE_FIELDS})
+    return {quote['symbol']: quote for quote in data.get('quoteResponse', {}).get('result') or []
+            if 'symbol' in quote}
+
+
+def poll_quotes(tickers, fetch=yahoo_quotes, guard=None, batch_size=QUOTE_BATCH_SIZE):
+    """
+    Quotes every ticker in requests of batch_size symbols. A failed request
+    is logged and its tickers are left out, so callers treat them as
+    unquoted rather than unmoved.
+    """
+    quotes = {}
+    for start in range(0, len(tickers), batch_size):
+        batch = tickers[start:start + batch_size]
+        try:
+            quotes.update(fetch(batch) if guard is None else guard.call("quote", fetch, batch))
+        except Exception as e:
+            logger.warning("Error polling quotes for %d tickers starting at %s: %s", len(batch), batch[0], e)
+    return quotes
@@ -0,0 +1,108 @@
+import math
+import threading
+import time
+
+import numpy as np
+
+BARS_PER_YEAR = 252 * 390
+MIN_BARS = 30
+RV_ESTIMATOR = "garman_klass"  # "close_to_close", "parkinson" or "garman_klass"
+RV_REFRESH_SECONDS = 1800
+
+_GK_CLOSE_WEIGHT = 2 * math.log(2) - 1
+
+
+def bar_sums(open_, high, low, close, previous_close=None):
+    """
+    Returns the per-estimator sums of squared log terms for a block of bars,
+    so blocks can be accumulated incrementally.
+    """
+    log_hl = np.log(high / low)
+    log_co = np.log(close / open_)
+    closes = close if previous_close is None else np.concatenate(([previous_close], close))
+    returns = np.diff(np.log(closes))
+    return {
+        "close_to_close": float(np.nansum(returns ** 2)),
+        "close_to_close_n": int(np.count_nonzero(~np.isnan(returns))),
+        "parkinson": float(np.nansum(log_hl ** 2)),
+        "garman_klass": float(np.nansum(0.5 * log_hl ** 2 - _GK_CLOSE_WEIGHT * log_co ** 2)),
+        "n": int(np.count_nonzero(~np.isnan(log_hl))),
+    }
+
+
+def annualized(sums, estimator=RV_ESTIMATOR):
+    """
+    Converts accumulated sums into an annualized volatility, or None if
+    there are fewer than MIN_BARS bars.
+    """
+    if estimator == "close_to_close":
+        n, variance = sums["close_to_close_n"], sums["close_to_close"]
+    elif estimator == "parkinson":
+        n, variance = sums["n"], sums["parkinson"] / (4 * math.log(2))
+    else:
+        n, variance = sums["n"], sums["garman_klass"]
+    if n < MIN_BARS or variance <= 0:
+        return None
+    return math.sqrt(variance / n * BARS_PER_YEAR)
+
+
+class RealizedVolatility:
+    """
+    Per-ticker intraday realized volatility, updated incrementally from
+    1-minute bars. Each update only consumes bars newer than the last one
+    seen, skipping the newest bar while it may still be forming, and the
+    sums reset at the start of each session.
+    """
+
+    def __init__(self, estimator=RV_ESTIMATOR, refresh_seconds=RV_REFRESH_SECONDS):
+        self.estimator = estimator
+        self.refresh_seconds = refresh_seconds
+        self.state = {}
+        self.lock = threading.Lock()
+
+    def update(self, ticker, bars, now=None):
+        if bars is None or len(bars) < 2:
+            return self.sigma(ticker)
+        with self.lock:
+            self._consume(ticker, bars, time.time() if now is None else now)
+        return self.sigma(ticker)
+
+    def _consume(self, ticker, bars, now):
+        index = bars.index
+        session = index[-1].date()
+        entry = self.state.get(ticker)
+        if entry is None or entry['session'] != session:
+            entry = {"session": session, "last_seen": None, "last_close": None, "sums": None}
+            self.state[ticker] = entry
+
+        complete = bars.iloc[:-1]
+        if entry['last_seen'] is not None:
+            complete = complete[complete.index > entry['last_seen']]
+        if len(complete):
+            columns = [np.asarray(complete[name], dtype=float).reshape(-1)
+                       for name in ('Open', 'High', 'Low', 'Close')]
+            sums = bar_sums(*columns, previous_close=entry['last_close'])
+            if entry['sums'] is None:
+                entry['sums'] = sums
+            else:
+                for key, value in sums.items():
+                    entry['sums'][key] += value
+            entry['last_seen'] = complete.index[-1]
+            entry['last_close'] = columns[3][-1]
+        entry['updated_at'] = now
+
+    def sigma(self, ticker, estimator=None):
+        entry = self.state.get(ticker)
+        if not entry or entry['sums'] is None:
+            return None
+        return annualized(entry['sums'], estimator or self.estimator)
+
+    def estimates(self, ticker):
+        return {name: self.sigma(ticker, name) for name in ("close_to_close", "parkinson", "garman_klass")}
+
+    def needs_refresh(self, ticker, now=None):
+        entry = self.state.get(ticker)
+        if entry is None:
+            return True
+        now = time.time() if now is None else now
+        return now - entry.get('updated_at', 0) >= self.refresh_seconds
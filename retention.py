@@ -0,0 +1,121 @@
+import csv
+import gzip
+import logging
+import os
+from collections import deque
+
+import gspread
+
+RETENTION_CYCLES = 12
+MAX_PRIMARY_ROWS = 5000
+ARCHIVE_MODE = "sheet"  # "sheet" for dated archive tabs, "local" for gzipped CSV files
+ARCHIVE_DIR = "history_archive"
+ARCHIVE_TAB_PREFIX = "Archive"
+TIMESTAMP_COLUMN = -1
+
+logger = logging.getLogger(__name__)
+
+
+class HistoryRetention:
+    """
+    Keeps the primary tab to the latest N cycles and under a row cap, moving
+    older rows in bulk to dated archive tabs or local gzipped CSV files.
+    """
+
+    def __init__(self, keep_cycles=RETENTION_CYCLES, max_rows=MAX_PRIMARY_ROWS,
+                 mode=ARCHIVE_MODE, archive_dir=ARCHIVE_DIR, header_rows=1):
+        self.keep_cycles = keep_cycles
+        self.max_rows = max_rows
+        self.mode = mode
+        self.archive_dir = archive_dir
+        self.header_rows = header_rows
+        self.cycle_rows = deque()
+
+    def record_cycle(self, row_count):
+        """
+        Registers how many data rows the cycle that just finished appended.
+        """
+        self.cycle_rows.append(row_count)
+
+    def rows_to_archive(self):
+        """
+        Returns how many of the oldest data rows fall outside the retention window.
+        """
+        stale = 0
+        cycles = list(self.cycle_rows)
+        if len(cycles) > self.keep_cycles:
+            stale = sum(cycles[:len(cycles) - self.keep_cycles])
+        kept = sum(cycles) - stale
+        if self.max_rows and kept + self.header_rows > self.max_rows:
+            stale += kept + self.header_rows - self.max_rows
+        return stale
+
+    def _forget_rows(self, count):
+        while count > 0 and self.cycle_rows:
+            oldest = self.cycle_rows.popleft()
+            if oldest > count:
+                self.cycle_rows.appendleft(oldest - count)
+                break
+            count -= oldest
+
+    def enforce(self, sheet, spreadsheet=None):
+        """
+        Archives and deletes rows outside the retention window with one bulk
+        read, one bulk write per archive date and one bulk delete.
+        """
+        count = self.rows_to_archive()
+        if count <= 0:
+            return 0
+        first = self.header_rows + 1
+        last = self.header_rows + count
+        try:
+            rows = sheet.get(f"A{first}:Z{last}")
+            if rows:
+                if self.mode == "local" or spreadsheet is None:
+                    archive_rows_locally(rows, self.archive_dir)
+                else:
+                    archive_rows_to_tabs(spreadsheet, rows)
+            sheet.delete_rows(first, last)
+        except Exception as e:
+            logger.error("Error archiving history rows: %s", e)
+            return 0
+        self._forget_rows(count)
+        logger.info("Archived %d rows older than the last %d cycles.", count, self.keep_cycles)
+        return count
+
+
+def group_rows_by_date(rows):
+    """
+    Groups sheet rows by the date part of their timestamp column.
+    """
+    groups = {}
+    for row in rows:
+        timestamp = row[TIMESTAMP_COLUMN] if row else ""
+        date = timestamp[:10] if timestamp else "undated"
+        groups.setdefault(date, []).append(row)
+    return groups
+
+
+def archive_rows_to_tabs(spreadsheet, rows, prefix=ARCHIVE_TAB_PREFIX):
+    """
+    Appends rows to one archive tab per date, creating tabs as needed.
+    """
+    for date, group in group_rows_by_date(rows).items():
+        title = f"{prefix} {date}"
+        try:
+            tab = spreadsheet.worksheet(title)
+        except gspread.exceptions.WorksheetNotFound:
+            width = max(len(row) for row in group)
+            tab = spreadsheet.add_worksheet(title=title, rows=len(group), cols=width)
+        tab.append_rows(group)
+
+
+def archive_rows_locally(rows, archive_dir=ARCHIVE_DIR):
+    """
+    Appends rows to one gzipped CSV file per date under archive_dir.
+    """
+    os.makedirs(archive_dir, exist_ok=True)
+    for date, group in group_rows_by_date(rows).items():
+        path = os.path.join(archive_dir, f"{date}.csv.gz")
+        with gzip.open(path, 'at', newline='') as file:
+            csv.writer(file).writerows(group)
@@ -0,0 +1,128 @@
+import argparse
+import json
+import logging
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from types import SimpleNamespace
+
+import bars
+import main
+from sinks import FanOut
+from synthetic_market import FakeClient, SyntheticMarket, synthetic_tickers
+
+UNIVERSE_SIZES = [75, 500, 1000, 2500, 5000]
+SHEETS_CALL_LATENCY = 0.3  # seconds per Sheets API call
+SHEETS_ROW_LATENCY = 0.0005  # seconds per appended row
+PROVIDER_LATENCY = 0.0  # seconds of simulated network time per provider call
+
+
+class RecordingFanOut(FanOut):
+    instances = []
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        RecordingFanOut.instances.append(self)
+
+
+class SummaryCapture(logging.Handler):
+    def __init__(self):
+        super().__init__()
+        self.summary = None
+
+    def emit(self, record):
+        if hasattr(record, "duration_s"):
+            self.summary = {key: getattr(record, key) for key in
+                            ("tickers", "analyzed", "recommended", "duration_s", "rss_mb")}
+
+
+def run_universe(size, seed=0, provider_latency=PROVIDER_LATENCY):
+    """
+    Runs one non-daemon main() cycle over a synthetic universe of `size`
+    tickers, with the synthetic market in place of yfinance and a fake
+    Sheets client, from a scratch working directory. Returns the cycle's
+    measurements.
+    """
+    tickers = synthetic_tickers(size)
+    market = SyntheticMarket(tickers, seed=seed, latency=provider_latency)
+    client = FakeClient(SHEETS_CALL_LATENCY, SHEETS_ROW_LATENCY)
+    os.chdir(tempfile.mkdtemp(prefix="scaling-"))
+    with open("stocks.txt", "w") as file:
+        file.write("\n".join(tickers) + "\n")
+
+    main.yf = bars.yf = market.provider()
+    main.gspread = SimpleNamespace(authorize=lambda creds: client, exceptions=main.gspread.exceptions)
+    main.ServiceAccountCredentials = SimpleNamespace(from_json_keyfile_name=lambda path, scope: None)
+    main.STOCKS_FILE_PATH = "stocks.txt"
+    main.FanOut = RecordingFanOut
+    main.DAEMON_MODE = False
+    main.STREAM_ENABLED = False
+    main.API_ENABLED = False
+    main.CYCLE_DEADLINE_SECONDS = None
+    capture = SummaryCapture()
+    logging.getLogger("main").addHandler(capture)
+
+    main.main()
+
+    sheet = client.open_by_key(main.SHEET_KEY).sheet1
+    flushes = [sink.latency_summary() for fanout in RecordingFanOut.instances for sink in fanout.sinks
+               if sink.sink.name == "sheets"]
+    result = dict(capture.summary or {}, size=size, provider_s=round(market.seconds, 3), provider_calls=market.calls,
+                  peak_rss_mb=round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+                  sheet_rows=len(sheet.rows) - 1, sheet_calls=sheet.api_calls)
+    if flushes and flushes[0]["flushes"]:
+        result.update(flushes=flushes[0]["flushes"], flush_mean_ms=round(flushes[0]["mean_ms"], 1),
+                      flush_max_ms=round(flushes[0]["max_ms"], 1))
+    return result
+
+
+def scaling_report(sizes=UNIVERSE_SIZES, seed=0, provider_latency=PROVIDER_LATENCY):
+    """
+    Runs each universe size in a fresh interpreter so memory figures are not
+    shared, and prints how cycle time, memory and output latency grow.
+    """
+    results = []
+    for size in sizes:
+        with tempfile.NamedTemporaryFile(suffix=".json", delete=False) as file:
+            path = file.name
+        start = time.perf_counter()
+        completed = subprocess.run([sys.executable, os.path.abspath(__file__), "--child", str(size), "--result", path,
+                                    "--seed", str(seed), "--provider-latency", str(provider_latency)],
+                                   stdout=subprocess.DEVNULL, cwd=os.path.dirname(os.path.abspath(__file__)))
+        if completed.returncode != 0:
+            print(f"{size} tickers: run failed with exit code {completed.returncode}")
+            continue
+        with open(path) as file:
+            result = json.load(file)
+        os.remove(path)
+        results.append(result)
+        print(f"{size} tickers done in {time.perf_counter() - start:.1f}s", file=sys.stderr)
+
+    print(f"{'tickers':>8} {'recs':>6} {'cycle s':>8} {'provider s':>10} {'pipeline s':>10} {'ms/ticker':>9} "
+          f"{'rss MB':>7} {'peak MB':>8} {'flushes':>7} {'flush ms':>9} {'max ms':>8}")
+    for result in results:
+        pipeline = result.get('duration_s', 0) - result['provider_s']
+        print(f"{result['size']:>8} {result.get('recommended', 0):>6} {result.get('duration_s', 0):>8.1f} "
+              f"{result['provider_s']:>10.1f} {pipeline:>10.1f} {pipeline / result['size'] * 1000:>9.2f} "
+              f"{result.get('rss_mb', 0):>7.0f} {result['peak_rss_mb']:>8.0f} {result.get('flushes', 0):>7} "
+              f"{result.get('flush_mean_ms', 0):>9.1f} {result.get('flush_max_ms', 0):>8.1f}")
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Scaling test of the pipeline on a synthetic market.")
+    parser.add_argument("sizes", nargs="*", type=int, default=UNIVERSE_SIZES)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--provider-latency", type=float, default=PROVIDER_LATENCY)
+    parser.add_argument("--child", type=int, help=argparse.SUPPRESS)
+    parser.add_argument("--result", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.child:
+        outcome = run_universe(args.child, args.seed, args.provider_latency)
+        with open(args.result, "w") as file:
+            json.dump(outcome, file)
+    else:
+        scaling_report(args.sizes, args.seed, args.provider_latency)
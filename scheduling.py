@@ -0,0 +1,104 @@
+import math
+import time
+
+CYCLE_DEADLINE_SECONDS = 540
+EDGE_WEIGHT = 1.0
+VOLUME_WEIGHT = 2.0
+MOVE_WEIGHT = 5.0
+STALENESS_WEIGHT = 0.5
+MOVE_THRESHOLD_PCT = 1.0  # spot move since the last analysis that triggers a re-analysis
+MAX_ANALYSIS_AGE_SECONDS = 7200
+SPOTLESS_RETRY_SECONDS = 600  # tickers analyzed without a spot (no options, failed calls) are retried after this
+
+
+class TickerPrioritizer:
+    """
+    Orders tickers each cycle by expected value of re-analysis: last edge,
+    option volume, spot move since the last check and minutes since the last
+    analysis. Tickers a cycle did not reach go first in the next one, and
+    tickers never analyzed rank above everything else.
+    """
+
+    def __init__(self):
+        self.state = {}
+        self.carry_over = []
+
+    def observe(self, ticker, stock_info=None, observations=None, now=None):
+        """
+        Records the outcome of analyzing a ticker.
+        """
+        now = time.time() if now is None else now
+        entry = self.state.setdefault(ticker, {})
+        observations = observations or {}
+        spot = observations.get('spot')
+        if spot is None and stock_info:
+            spot = stock_info.get("Current Price")
+        if spot is not None:
+            entry['previous_spot'] = entry.get('spot', spot)
+            entry['spot'] = spot
+        entry['edge'] = float(stock_info["Market Edge"]) if stock_info else 0.0
+        entry['option_volume'] = observations.get('option_volume', entry.get('option_volume', 0.0))
+        entry['analyzed_at'] = now
+
+    def score(self, ticker, now=None):
+        entry = self.state.get(ticker)
+        if not entry:
+            return math.inf
+        now = time.time() if now is None else now
+        move = 0.0
+        if entry.get('spot') and entry.get('previous_spot'):
+            move = abs(entry['spot'] / entry['previous_spot'] - 1) * 100
+        staleness = (now - entry['analyzed_at']) / 60
+        return (EDGE_WEIGHT * max(entry.get('edge', 0.0), 0.0)
+                + VOLUME_WEIGHT * math.log1p(max(entry.get('option_volume') or 0.0, 0.0))
+                + MOVE_WEIGHT * move
+                + STALENESS_WEIGHT * staleness)
+
+    def order(self, tickers, now=None):
+        """
+        Returns this cycle's processing order: carried-over tickers first,
+        then the rest by descending score.
+        """
+        now = time.time() if now is None else now
+        universe = set(tickers)
+        carried = [ticker for ticker in self.carry_over if ticker in universe]
+        carried_set = set(carried)
+        rest = [ticker for ticker in tickers if ticker not in carried_set]
+        rest.sort(key=lambda ticker: self.score(ticker, now), reverse=True)
+        self.carry_over = []
+        return carried + rest
+
+    def defer(self, tickers):
+        """
+        Marks tickers a cycle did not reach so the next cycle starts with them.
+        """
+        self.carry_over = list(tickers)
+
+    def due(self, tickers, spots, threshold_pct=MOVE_THRESHOLD_PCT, max_age=MAX_ANALYSIS_AGE_SECONDS,
+            spotless_retry=SPOTLESS_RETRY_SECONDS, now=None):
+        """
+        Returns the tickers worth re-analyzing given fresh `spots` from a
+        quote poll: those never analyzed, those deferred by the last cycle,
+        those whose spot moved more than threshold_pct since their last
+        analysis and those analyzed more than max_age seconds ago. Tickers
+        whose analysis produced no spot are retried after spotless_retry
+        seconds, and unquoted tickers are due only by age.
+        """
+        now = time.time() if now is None else now
+        carried = set(self.carry_over)
+        due = []
+        for ticker in tickers:
+            entry = self.state.get(ticker)
+            if not entry or 'analyzed_at' not in entry or ticker in carried:
+                due.append(ticker)
+                continue
+            age = now - entry['analyzed_at']
+            if age > max_age or (not entry.get('spot') and age > spotless_retry):
+                due.append(ticker)
+                continue
+            if not entry.get('spot'):
+                continue
+            spot = spots.get(ticker)
+            if spot is not None and abs(spot / entry['spot'] - 1) * 100 > threshold_pct:
+                due.append(ticker)
+        return due
@@ -0,0 +1,138 @@
+import logging
+
+import numpy as np
+import pandas as pd
+from scipy.stats import norm
+
+from monte_carlo import MC_SEED, atm_volatility, contract_probabilities
+
+RISK_FREE_RATE = 0.01
+DEFAULT_IV = 0.2
+HORIZON_DAYS = 14
+CANDIDATES_TOP_N = 3
+MAX_PREMIUM = 250  # contracts priced above this are never scored
+PROBABILITY_ITM = 0.5
+CANDIDATE_CRITERIA = ["closest", "highest_edge", "cheapest", "edge_per_dollar"]
+PROBABILITY_MODEL = "black_scholes"  # or "monte_carlo"
+
+logger = logging.getLogger(__name__)
+
+
+def calculate_probability_ITM(S, K, T, r, sigma):
+    try:
+        d1 = (np.log(S / K) + (r + 0.5 * sigma ** 2) * T) / (sigma * np.sqrt(T))
+        return norm.cdf(d1)
+    except Exception as e:
+        logger.warning("Error calculating probability ITM: %s", e)
+        return 0
+
+
+def score_options(options_data, S, probability_ITM, realized_sigma=None, model=PROBABILITY_MODEL, seed=MC_SEED):
+    """
+    Returns the out-of-the-money options with positive market edge, with
+    distance, probability_ITM and edge columns computed for the whole chain at once.
+    When a realized volatility is given it replaces DEFAULT_IV for missing
+    IVs and an iv_rv column is added. The "monte_carlo" model simulates one
+    set of paths at the chain's ATM volatility and also adds a
+    probability_touch column.
+    """
+    otm_options = options_data[
+        ((options_data['optionType'] == 'call') & (options_data['strike'] > S)) |
+        ((options_data['optionType'] == 'put') & (options_data['strike'] < S))
+    ].copy()
+
+    if otm_options.empty:
+        logger.debug("No out-of-the-money options found.")
+        return otm_options
+
+    fallback = realized_sigma or DEFAULT_IV
+    if 'impliedVolatility' in otm_options:
+        sigma = otm_options['impliedVolatility'].fillna(fallback).to_numpy(dtype=float)
+    else:
+        sigma = np.full(len(otm_options), fallback)
+    if realized_sigma:
+        otm_options['iv_rv'] = sigma / realized_sigma
+    otm_options['distance'] = abs(otm_options['strike'] - S)
+    strikes = otm_options['strike'].to_numpy(dtype=float)
+    if model == "monte_carlo":
+        otm_options['probability_ITM'], otm_options['probability_touch'] = contract_probabilities(
+            S, strikes, otm_options['optionType'] == 'call', atm_volatility(strikes, sigma, S),
+            HORIZON_DAYS / 365, RISK_FREE_RATE, seed=seed
+        )
+    else:
+        otm_options['probability_ITM'] = calculate_probability_ITM(
+            S, strikes, HORIZON_DAYS / 365, RISK_FREE_RATE, sigma
+        )
+    otm_options['edge'] = (otm_options['probability_ITM'] / probability_ITM - 1) * 100
+
+    valid_options = otm_options[otm_options['edge'] > 0]
+    if valid_options.empty:
+        logger.debug("No options with positive market edge found.")
+    return valid_options
+
+
+def closest_option(valid_options):
+    """
+    Picks the scored option with the strike closest to spot, the first in
+    chain order on ties.
+    """
+    if valid_options.empty:
+        return None
+    best_option = valid_options.sort_values(by='distance', kind='stable').head(1)
+    return best_option.iloc[0] if not best_option.empty else None
+
+
+def recommend_single_option(options_data, S, probability_ITM, model=PROBABILITY_MODEL, seed=MC_SEED):
+    try:
+        return closest_option(score_options(options_data, S, probability_ITM, model=model, seed=seed))
+    except Exception as e:
+        logger.warning("Error recommending single option: %s", e)
+        return None
+
+
+def criterion_key(criterion, distance, edge, premium):
+    """
+    Returns the sort key of one ranking criterion, lower is better, with
+    inf for contracts the criterion cannot rank.
+    """
+    if criterion == "closest":
+        return distance
+    if criterion == "highest_edge":
+        return -edge
+    if criterion == "cheapest":
+        return np.where(premium > 0, premium, np.inf)
+    if criterion == "edge_per_dollar":
+        with np.errstate(divide='ignore', invalid='ignore'):
+            return np.where(premium > 0, -edge / premium, np.inf)
+    raise ValueError(f"Unknown ranking criterion '{criterion}'")
+
+
+def _criterion_order(valid_options, criterion):
+    """
+    Returns row positions ordered best-first for one ranking criterion.
+    """
+    key = criterion_key(criterion, valid_options['distance'].to_numpy(dtype=float),
+                        valid_options['edge'].to_numpy(dtype=float), valid_options['lastPrice'].to_numpy(dtype=float))
+    order = np.argsort(key, kind='stable')
+    return order[np.isfinite(key[order])]
+
+
+def rank_candidates(valid_options, top_n=CANDIDATES_TOP_N, criteria=CANDIDATE_CRITERIA):
+    """
+    Returns the top_n contracts under each criterion from options already
+    scored by score_options, with criterion and rank columns.
+    """
+    if valid_options.empty:
+        return pd.DataFrame()
+
+    premium = valid_options['lastPrice'].to_numpy(dtype=float)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        edge_per_dollar = np.where(premium > 0, valid_options['edge'].to_numpy(dtype=float) / premium, np.nan)
+    valid_options = valid_options.assign(edge_per_dollar=edge_per_dollar)
+
+    tables = []
+    for criterion in criteria:
+        picks = _criterion_order(valid_options, criterion)[:top_n]
+        table = valid_options.iloc[picks]
+        tables.append(table.assign(criterion=criterion, rank=np.arange(1, len(table) + 1)))
+    return pd.concat(tables, ignore_index=True)
@@ -0,0 +1,76 @@
+from multiprocessing import resource_tracker, shared_memory
+
+import numpy as np
+
+from batch_scoring import score_universe, select_best
+from snapshots import chain_columns
+
+ALIGNMENT = 64
+
+# Start the resource tracker before any worker pool is created so workers
+# inherit it; otherwise each worker's own tracker would unlink blocks it
+# merely attached to when the worker exits.
+resource_tracker.ensure_running()
+
+
+def _aligned(offset):
+    return (offset + ALIGNMENT - 1) // ALIGNMENT * ALIGNMENT
+
+
+def share_columns(columns):
+    """
+    Copies chain column arrays into one shared memory block. Returns the
+    block, which the caller must close and unlink once readers are done, and a
+    small picklable descriptor for readers.
+    """
+    layout = []
+    size = 0
+    for name, array in columns.items():
+        array = np.ascontiguousarray(array)
+        size = _aligned(size)
+        layout.append((name, array.dtype.str, size, len(array)))
+        size += array.nbytes
+    block = shared_memory.SharedMemory(create=True, size=max(size, 1))
+    for (name, dtype, offset, length), array in zip(layout, columns.values()):
+        np.ndarray(length, dtype=dtype, buffer=block.buf, offset=offset)[:] = array
+    return block, {"name": block.name, "layout": layout}
+
+
+def share_chain(options_df, spot, when=None, realized_vol=None):
+    """
+    Shares the compact column form of a combined calls/puts chain frame.
+    """
+    return share_columns(chain_columns(options_df, spot, when, realized_vol))
+
+
+def attach_columns(descriptor):
+    """
+    Maps a shared chain into this process without copying. Returns the block
+    handle, which must stay open while the arrays are in use, and the arrays.
+    Readers share the creator's resource tracker, so only the creator unlinks
+    the block.
+    """
+    block = shared_memory.SharedMemory(name=descriptor["name"])
+    columns = {
+        name: np.ndarray(length, dtype=dtype, buffer=block.buf, offset=offset)
+        for name, dtype, offset, length in descriptor["layout"]
+    }
+    return block, columns
+
+
+def score_shared_chain(descriptor):
+    """
+    Worker entry point: applies the recommendation rule to a shared chain and
+    returns the chosen row, its probability ITM and edge, or None.
+    """
+    block, columns = attach_columns(descriptor)
+    try:
+        scored = score_universe(columns, key=columns['time'])
+        best = select_best(scored)
+        if len(best) == 0:
+            return None
+        return {"row": int(scored['row'][best[0]]), "probability_ITM": float(scored['probability_ITM'][best[0]]),
+                "edge": float(scored['edge'][best[0]])}
+    finally:
+        del columns
+        block.close()
@@ -0,0 +1,323 @@
+import csv
+import json
+import logging
+import os
+import queue
+import threading
+import time
+from collections import deque
+from datetime import datetime
+
+import pandas as pd
+
+SINK_BATCH_SIZE = 50
+SINK_FLUSH_INTERVAL = 5.0
+SINK_MAX_RETRIES = 5  # failed flushes of the same rows before they are dropped
+SINK_RETRY_BASE_SECONDS = 2.0  # first retry delay, doubled after each further failure
+SINK_RETRY_MAX_SECONDS = 60.0
+LATENCY_WINDOW = 100
+
+logger = logging.getLogger(__name__)
+
+
+class OutputSink:
+    """
+    Destination for cycle result records. Subclasses implement write_rows,
+    which is only ever called from the sink's own background thread.
+    """
+
+    name = "sink"
+
+    def write_rows(self, records):
+        raise NotImplementedError
+
+    def end_cycle(self):
+        pass
+
+    def resume_cycle(self, records):
+        """
+        Called on restart with the records this sink already wrote during the
+        interrupted cycle.
+        """
+
+    def close(self):
+        pass
+
+
+class Acknowledgement:
+    """
+    Calls `callback` once each of `parts` destinations has written its share
+    of a submission, or straight away when there are none.
+    """
+
+    def __init__(self, parts, callback):
+        self.remaining = parts
+        self.callback = callback
+        self.lock = threading.Lock()
+        if parts == 0:
+            callback()
+
+    def done(self):
+        with self.lock:
+            self.remaining -= 1
+            fire = self.remaining == 0
+        if fire:
+            self.callback()
+
+
+class StdoutSink(OutputSink):
+    name = "stdout"
+
+    def __init__(self, fields):
+        self.fields = fields
+
+    def write_rows(self, records):
+        lines = ["\t".join(str(record.get(field, "")) for field in self.fields) for record in records]
+        print("\n".join(lines), flush=True)
+
+
+class CsvSink(OutputSink):
+    name = "csv"
+
+    def __init__(self, path, fields):
+        self.path = path
+        self.fields = fields
+
+    def write_rows(self, records):
+        new_file = not os.path.exists(self.path) or os.path.getsize(self.path) == 0
+        with open(self.path, 'a', newline='') as file:
+            writer = csv.DictWriter(file, fieldnames=self.fields, extrasaction='ignore')
+            if new_file:
+                writer.writeheader()
+            writer.writerows(records)
+
+
+class JsonLinesSink(OutputSink):
+    name = "jsonl"
+
+    def __init__(self, path):
+        self.path = path
+
+    def write_rows(self, records):
+        with open(self.path, 'a') as file:
+            file.writelines(json.dumps(record, default=str) + "\n" for record in records)
+
+
+class ParquetSink(OutputSink):
+    """
+    Writes each flush as a new part file, since Parquet files cannot be appended to.
+    """
+
+    name = "parquet"
+
+    def __init__(self, directory):
+        pd.io.parquet.get_engine("auto")
+        self.directory = directory
+        self.parts = 0
+        os.makedirs(directory, exist_ok=True)
+
+    def write_rows(self, records):
+        self.parts += 1
+        stamp = datetime.now().strftime("%Y%m%d-%H%M%S")
+        path = os.path.join(self.directory, f"part-{stamp}-{self.parts:05d}.parquet")
+        pd.DataFrame.from_records(records).to_parquet(path, index=False)
+
+
+class SheetsSink(OutputSink):
+    """
+    Appends records to a worksheet in one API call per flush and applies
+    history retention at each cycle boundary, on the same thread as the appends.
+    """
+
+    name = "sheets"
+
+    def __init__(self, sheet, fields, spreadsheet=None, retention=None):
+        self.sheet = sheet
+        self.fields = fields
+        self.spreadsheet = spreadsheet
+        self.retention = retention
+        self.rows_this_cycle = 0
+
+    def write_rows(self, records):
+        self.sheet.append_rows([[record.get(field, "") for field in self.fields] for record in records])
+        self.rows_this_cycle += len(records)
+
+    def end_cycle(self):
+        if self.retention is not None:
+            self.retention.record_cycle(self.rows_this_cycle)
+            self.retention.enforce(self.sheet, self.spreadsheet)
+        self.rows_this_cycle = 0
+
+    def resume_cycle(self, records):
+        self.rows_this_cycle += len(records)
+
+
+class BufferedSink:
+    """
+    Runs a sink on its own thread. Records are buffered and written in batches
+    of batch_size, or after flush_interval seconds, or at a cycle boundary.
+    A submission's on_written callback runs on that thread once its records
+    have been written successfully. A failed write keeps the records and is
+    retried after a doubling backoff; after SINK_MAX_RETRIES failures they
+    are dropped with an error and their callbacks never run.
+    """
+
+    def __init__(self, sink, batch_size=SINK_BATCH_SIZE, flush_interval=SINK_FLUSH_INTERVAL):
+        self.sink = sink
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.latencies = deque(maxlen=LATENCY_WINDOW)
+        self.failures = 0
+        self.retry_at = 0.0
+        self.queue = queue.Queue()
+        self.thread = threading.Thread(target=self._run, name=f"sink-{sink.name}", daemon=True)
+        self.thread.start()
+
+    def submit(self, records, on_written=None):
+        self.queue.put(("rows", (list(records), on_written)))
+
+    def end_cycle(self):
+        self.queue.put(("cycle", None))
+
+    def resume_cycle(self, records):
+        self.queue.put(("resume", list(records)))
+
+    def flush(self, timeout=None):
+        done = threading.Event()
+        self.queue.put(("flush", done))
+        return done.wait(timeout)
+
+    def close(self, timeout=None):
+        self.queue.put(("close", None))
+        self.thread.join(timeout)
+
+    def latency_summary(self):
+        """
+        Returns flush count and last/mean/max flush latency in milliseconds.
+        """
+        if not self.latencies:
+            return {"flushes": 0}
+        values = list(self.latencies)
+        return {
+            "flushes": len(values),
+            "last_ms": values[-1] * 1000,
+            "mean_ms": sum(values) / len(values) * 1000,
+            "max_ms": max(values) * 1000,
+        }
+
+    def _backing_off(self):
+        return time.monotonic() < self.retry_at
+
+    def _write(self, buffer, callbacks):
+        if not buffer:
+            return
+        start = time.perf_counter()
+        try:
+            self.sink.write_rows(buffer)
+        except Exception as e:
+            self.latencies.append(time.perf_counter() - start)
+            self.failures += 1
+            if self.failures <= SINK_MAX_RETRIES:
+                delay = min(SINK_RETRY_BASE_SECONDS * 2 ** (self.failures - 1), SINK_RETRY_MAX_SECONDS)
+                self.retry_at = time.monotonic() + delay
+                logger.warning("Error flushing %d rows to %s sink, retrying in %.1fs: %s", len(buffer),
+                               self.sink.name, delay, e)
+                return
+            logger.error("Dropping %d rows after %d failed flushes to %s sink: %s", len(buffer), self.failures,
+                         self.sink.name, e)
+        else:
+            self.latencies.append(time.perf_counter() - start)
+            for callback in callbacks:
+                try:
+                    callback()
+                except Exception as e:
+                    logger.error("Error acknowledging rows written to %s sink: %s", self.sink.name, e)
+        self.failures = 0
+        self.retry_at = 0.0
+        buffer.clear()
+        callbacks.clear()
+
+    def _run(self):
+        buffer = []
+        callbacks = []
+        deadline = None
+        while True:
+            timeout = None if not buffer else max(0.0, max(deadline, self.retry_at) - time.monotonic())
+            try:
+                kind, payload = self.queue.get(timeout=timeout)
+            except queue.Empty:
+                self._write(buffer, callbacks)
+                continue
+            if kind == "rows":
+                records, on_written = payload
+                if not buffer:
+                    deadline = time.monotonic() + self.flush_interval
+                buffer.extend(records)
+                if on_written is not None:
+                    callbacks.append(on_written)
+                if len(buffer) >= self.batch_size and not self._backing_off():
+                    self._write(buffer, callbacks)
+            elif kind == "cycle":
+                if not self._backing_off():
+                    self._write(buffer, callbacks)
+                try:
+                    self.sink.end_cycle()
+                except Exception as e:
+                    logger.error("Error ending cycle on %s sink: %s", self.sink.name, e)
+            elif kind == "resume":
+                self.sink.resume_cycle(payload)
+            elif kind == "flush":
+                if not self._backing_off():
+                    self._write(buffer, callbacks)
+                payload.set()
+            elif kind == "close":
+                self._write(buffer, callbacks)
+                if buffer:
+                    logger.error("Dropping %d unwritten rows as the %s sink closes.", len(buffer), self.sink.name)
+                self.sink.close()
+                return
+
+
+class FanOut:
+    """
+    Sends the same records to several buffered sinks. Each sink drains on its
+    own thread, so a slow sink never delays a fast one or the caller.
+    """
+
+    def __init__(self, sinks, batch_size=SINK_BATCH_SIZE, flush_interval=SINK_FLUSH_INTERVAL):
+        self.sinks = [BufferedSink(sink, batch_size, flush_interval) for sink in sinks]
+
+    def submit(self, records, on_written=None):
+        """
+        Queues records for every sink; on_written runs once all of them have
+        written the records.
+        """
+        acknowledgement = None if on_written is None else Acknowledgement(len(self.sinks), on_written)
+        for sink in self.sinks:
+            sink.submit(records, None if acknowledgement is None else acknowledgement.done)
+
+    def end_cycle(self):
+        for sink in self.sinks:
+            sink.end_cycle()
+
+    def resume_cycle(self, records):
+        for sink in self.sinks:
+            sink.resume_cycle(records)
+
+    def flush(self, timeout=None):
+        return all(sink.flush(timeout) for sink in self.sinks)
+
+    def close(self, timeout=None):
+        for sink in self.sinks:
+            sink.close(timeout)
+
+    def latency_report(self):
+        lines = []
+        for sink in self.sinks:
+            summary = sink.latency_summary()
+            if summary["flushes"]:
+                lines.append(f"{sink.sink.name}: {summary['flushes']} flushes, last {summary['last_ms']:.1f} ms, "
+                             f"mean {summary['mean_ms']:.1f} ms, max {summary['max_ms']:.1f} ms")
+            else:
+                lines.append(f"{sink.sink.name}: no flushes yet")
+        return lines
@@ -0,0 +1,102 @@
+import logging
+import os
+import time
+
+import numpy as np
+
+SNAPSHOT_DIR = "snapshots"
+
+# Column name -> dtype of the raw little-endian file it is appended to.
+SNAPSHOT_COLUMNS = {
+    "time": "<i8",       # snapshot time, epoch seconds
+    "spot": "<f8",       # underlying price used for the snapshot
+    "strike": "<f8",
+    "is_call": "u1",
+    "expiry": "<i8",     # expiration, epoch days
+    "last_price": "<f8",
+    "iv": "<f8",         # NaN where the chain had no implied volatility
+    "volume": "<f8",
+    "realized_vol": "<f8",  # ticker's realized volatility at the snapshot, NaN when unknown
+}
+# Columns added after snapshots were first written; older files lack them and read as NaN.
+OPTIONAL_COLUMNS = {"realized_vol"}
+
+logger = logging.getLogger(__name__)
+
+
+def ticker_dir(ticker, root=SNAPSHOT_DIR):
+    return os.path.join(root, ticker.replace("/", "_"))
+
+
+def chain_columns(options_df, spot, when=None, realized_vol=None):
+    """
+    Converts a combined calls/puts chain frame into snapshot column arrays.
+    """
+    rows = len(options_df)
+    when = int(time.time() if when is None else when)
+    expiry = options_df['expiration'].to_numpy().astype('datetime64[D]').astype(np.int64)
+    iv = options_df['impliedVolatility'] if 'impliedVolatility' in options_df else np.full(rows, np.nan)
+    volume = options_df['volume'] if 'volume' in options_df else np.full(rows, np.nan)
+    return {
+        "time": np.full(rows, when, dtype=np.int64),
+        "spot": np.full(rows, float(spot)),
+        "strike": options_df['strike'].to_numpy(dtype=float),
+        "is_call": (options_df['optionType'] == 'call').to_numpy(dtype=np.uint8),
+        "expiry": expiry,
+        "last_price": options_df['lastPrice'].to_numpy(dtype=float),
+        "iv": np.asarray(iv, dtype=float),
+        "volume": np.asarray(volume, dtype=float),
+        "realized_vol": np.full(rows, float(realized_vol) if realized_vol else np.nan),
+    }
+
+
+def append_snapshot(ticker, options_df, spot, when=None, root=SNAPSHOT_DIR, realized_vol=None):
+    """
+    Appends one chain snapshot to the ticker's column files. Rows of a
+    snapshot stay contiguous, so readers can split on the time column. An
+    optional column missing from older files is first padded with NaN up to
+    the rows already stored.
+    """
+    try:
+        columns = chain_columns(options_df, spot, when, realized_vol)
+        directory = ticker_dir(ticker, root)
+        os.makedirs(directory, exist_ok=True)
+        time_path = os.path.join(directory, "time.bin")
+        stored = os.path.getsize(time_path) // np.dtype(SNAPSHOT_COLUMNS['time']).itemsize \
+            if os.path.exists(time_path) else 0
+        for name, dtype in SNAPSHOT_COLUMNS.items():
+            path = os.path.join(directory, f"{name}.bin")
+            padding = stored if name in OPTIONAL_COLUMNS and stored and not os.path.exists(path) else 0
+            with open(path, 'ab') as file:
+                np.full(padding, np.nan, dtype=dtype).tofile(file)
+                columns[name].astype(dtype, copy=False).tofile(file)
+    except Exception as e:
+        logger.warning("Error storing chain snapshot for %s: %s", ticker, e)
+
+
+def open_snapshots(ticker, root=SNAPSHOT_DIR):
+    """
+    Memory-maps a ticker's snapshot columns. Columns are truncated to the
+    shortest one in case the last append was interrupted; optional columns
+    an older store lacks are NaN.
+    """
+    directory = ticker_dir(ticker, root)
+    columns = {}
+    for name, dtype in SNAPSHOT_COLUMNS.items():
+        path = os.path.join(directory, f"{name}.bin")
+        if not os.path.exists(path) or os.path.getsize(path) == 0:
+            if name in OPTIONAL_COLUMNS:
+                continue
+            return None
+        columns[name] = np.memmap(path, dtype=dtype, mode='r')
+    rows = min(len(column) for column in columns.values())
+    columns = {name: column[:rows] for name, column in columns.items()}
+    for name in OPTIONAL_COLUMNS - set(columns):
+        columns[name] = np.full(rows, np.nan, dtype=SNAPSHOT_COLUMNS[name])
+    return columns
+
+
+def list_tickers(root=SNAPSHOT_DIR):
+    if not os.path.isdir(root):
+        return []
+    return sorted(name for name in os.listdir(root) if os.path.isdir(os.path.join(root, name)))
@@ -0,0 +1,197 @@
+from datetime import date
+
+import numpy as np
+import pandas as pd
+from scipy.special import ndtr
+
+from monte_carlo import atm_volatility
+from scoring import DEFAULT_IV, RISK_FREE_RATE
+
+STRATEGY_TYPES = ["bull_call", "bear_put", "strangle"]
+STRATEGIES_TOP_N = 3
+STRATEGY_MONEYNESS_BAND = 0.25  # legs kept within |ln(strike / spot)| of this
+STRATEGY_MIN_VOLUME = 1
+STRATEGY_MIN_OPEN_INTEREST = 10  # a leg is liquid with either enough volume or enough open interest
+STRATEGY_BLOCK_PAIRS = 262144  # leg pairs evaluated per broadcast block
+
+
+def strategy_legs(options_data, S, band=STRATEGY_MONEYNESS_BAND, min_volume=STRATEGY_MIN_VOLUME,
+                  min_open_interest=STRATEGY_MIN_OPEN_INTEREST):
+    """
+    Prunes a chain to the contracts worth pairing: a positive premium, a
+    strike within the moneyness band and either some volume or some open
+    interest. Columns the chain lacks do not filter anything.
+    """
+    strike = options_data['strike'].to_numpy(dtype=float)
+    premium = options_data['lastPrice'].to_numpy(dtype=float)
+    keep = (premium > 0) & (np.abs(np.log(strike / S)) <= band)
+    liquid = np.zeros(len(options_data), dtype=bool)
+    has_liquidity = False
+    for column, minimum in (('volume', min_volume), ('openInterest', min_open_interest)):
+        if column in options_data:
+            liquid |= options_data[column].fillna(0).to_numpy(dtype=float) >= minimum
+            has_liquidity = True
+    if has_liquidity:
+        keep &= liquid
+    return options_data[keep]
+
+
+def expected_payoffs(S, strikes, T, r, sigma):
+    """
+    Returns the lognormal expected payoffs at expiry of calls and puts at
+    each strike, undiscounted.
+    """
+    sd = sigma * np.sqrt(T)
+    d1 = (np.log(S / strikes) + (r + 0.5 * sigma ** 2) * T) / sd
+    d2 = d1 - sd
+    forward = S * np.exp(r * T)
+    return forward * ndtr(d1) - strikes * ndtr(d2), strikes * ndtr(-d2) - forward * ndtr(-d1)
+
+
+def probability_above(S, levels, T, r, sigma):
+    """
+    Lognormal probability that the underlying finishes above each level.
+    """
+    levels = np.asarray(levels, dtype=float)
+    with np.errstate(divide='ignore'):
+        d2 = (np.log(S / np.maximum(levels, 0.0)) + (r - 0.5 * sigma ** 2) * T) / (sigma * np.sqrt(T))
+    return ndtr(d2)
+
+
+def top_pairs(profit_block, rows, columns, top_n=STRATEGIES_TOP_N, block_pairs=STRATEGY_BLOCK_PAIRS):
+    """
+    Finds the top_n (row, column) pairs by profit without materializing the
+    full rows x columns grid: profit_block(start, stop) returns the profits
+    of rows start:stop against every column, with -inf for invalid pairs,
+    and only each block's best top_n survive. Returns (rows, columns,
+    profits) best-first.
+    """
+    block = max(1, block_pairs // max(columns, 1))
+    kept_rows, kept_columns, kept_profits = [], [], []
+    for start in range(0, rows, block):
+        profit = profit_block(start, min(start + block, rows)).ravel()
+        count = min(top_n, profit.size)
+        if not count:
+            continue
+        best = np.argpartition(-profit, count - 1)[:count]
+        best = best[np.isfinite(profit[best])]
+        kept_rows.append(start + best // columns)
+        kept_columns.append(best % columns)
+        kept_profits.append(profit[best])
+    if not kept_profits:
+        return np.array([], dtype=int), np.array([], dtype=int), np.array([])
+    pair_rows, pair_columns, profits = (np.concatenate(kept) for kept in (kept_rows, kept_columns, kept_profits))
+    order = np.argsort(-profits, kind='stable')[:top_n]
+    return pair_rows[order], pair_columns[order], profits[order]
+
+
+def _expiration_pairs(strike, price, is_call, S, T, sigma, r, top_n, block_pairs):
+    """
+    Returns {strategy: (leg1, leg2, expected profit)} for the best pairs of
+    one expiration, legs as positions into its strike-sorted arrays. Verticals
+    are (long, short); strangles are (put, call).
+    """
+    call_value, put_value = expected_payoffs(S, strike, T, r, sigma)
+    discount = np.exp(-r * T)
+    calls, puts = np.flatnonzero(is_call), np.flatnonzero(~is_call)
+
+    def vertical(legs, value, descending):
+        # Long the row leg, short the column leg further out of the money in the spread's direction.
+        legs = legs[::-1] if descending else legs
+        legs_strike, legs_price, legs_value = strike[legs], price[legs], discount * value[legs]
+
+        def profit_block(start, stop):
+            cost = legs_price[start:stop, None] - legs_price[None, :]
+            width = np.abs(legs_strike[None, :] - legs_strike[start:stop, None])
+            valid = (width > 0) & (cost > 0) & (cost < width)
+            if descending:
+                valid &= legs_strike[None, :] < legs_strike[start:stop, None]
+            else:
+                valid &= legs_strike[None, :] > legs_strike[start:stop, None]
+            return np.where(valid, legs_value[start:stop, None] - legs_value[None, :] - cost, -np.inf)
+
+        rows, columns, profits = top_pairs(profit_block, len(legs), len(legs), top_n, block_pairs)
+        return legs[rows], legs[columns], profits
+
+    otm_puts = puts[strike[puts] < S]
+    otm_calls = calls[strike[calls] > S]
+    put_cost = price[otm_puts] - discount * put_value[otm_puts]
+    call_cost = price[otm_calls] - discount * call_value[otm_calls]
+    rows, columns, profits = top_pairs(lambda start, stop: -(put_cost[start:stop, None] + call_cost[None, :]),
+                                       len(otm_puts), len(otm_calls), top_n, block_pairs)
+    return {
+        "bull_call": vertical(calls, call_value, descending=False),
+        "bear_put": vertical(puts, put_value, descending=True),
+        "strangle": (otm_puts[rows], otm_calls[columns], profits),
+    }
+
+
+def search_strategies(options_data, S, realized_sigma=None, top_n=STRATEGIES_TOP_N, strategies=STRATEGY_TYPES,
+                      today=None, block_pairs=STRATEGY_BLOCK_PAIRS, **prune):
+    """
+    Ranks vertical spreads (bull calls, bear puts) and long strangles by
+    probability-weighted payoff: the discounted lognormal expectation of the
+    payoff at expiry minus the net premium, with the realized volatility
+    when given and each expiration's ATM IV otherwise. Legs are pruned by
+    strategy_legs and pairs are evaluated per expiration in broadcast
+    blocks of block_pairs. Returns the top_n of each strategy across all
+    expirations, with strategy and rank columns.
+    """
+    legs = strategy_legs(options_data, S, **prune)
+    if legs.empty:
+        return pd.DataFrame()
+    strike = legs['strike'].to_numpy(dtype=float)
+    price = legs['lastPrice'].to_numpy(dtype=float)
+    is_call = (legs['optionType'] == 'call').to_numpy()
+    iv = legs['impliedVolatility'].to_numpy(dtype=float) if 'impliedVolatility' in legs else np.full(len(legs), np.nan)
+    expirations, codes = np.unique(legs['expiration'].to_numpy(dtype=str), return_inverse=True)
+    days = (expirations.astype('datetime64[D]') - np.datetime64(today or date.today(), 'D')).astype(int)
+    years = np.maximum(days, 1) / 365
+    sigmas = np.empty(len(expirations))
+    order = np.lexsort((strike, codes))
+    bounds = np.searchsorted(codes[order], np.arange(len(expirations) + 1))
+
+    found = {strategy: [] for strategy in strategies}
+    for code in range(len(expirations)):
+        rows = order[bounds[code]:bounds[code + 1]]
+        quoted = rows[~np.isnan(iv[rows])]
+        sigmas[code] = realized_sigma or (atm_volatility(strike[quoted], iv[quoted], S) if len(quoted) else DEFAULT_IV)
+        pairs = _expiration_pairs(strike[rows], price[rows], is_call[rows], S, years[code], sigmas[code],
+                                  RISK_FREE_RATE, top_n, block_pairs)
+        for strategy in strategies:
+            first, second, profits = pairs[strategy]
+            found[strategy].append((rows[first], rows[second], profits))
+
+    tables = []
+    for strategy in strategies:
+        first, second, profits = (np.concatenate(parts) for parts in zip(*found[strategy]))
+        picked = np.argsort(-profits, kind='stable')[:top_n]
+        first, second, profits = first[picked], second[picked], profits[picked]
+        T, sigma = years[codes[first]], sigmas[codes[first]]
+        if strategy == "strangle":
+            cost = price[first] + price[second]
+            max_gain = np.full(len(cost), np.inf)
+            probability = (1 - probability_above(S, strike[first] - cost, T, RISK_FREE_RATE, sigma)
+                           + probability_above(S, strike[second] + cost, T, RISK_FREE_RATE, sigma))
+        else:
+            cost = price[first] - price[second]
+            max_gain = np.abs(strike[second] - strike[first]) - cost
+            if strategy == "bull_call":
+                probability = probability_above(S, strike[first] + cost, T, RISK_FREE_RATE, sigma)
+            else:
+                probability = 1 - probability_above(S, strike[first] - cost, T, RISK_FREE_RATE, sigma)
+        tables.append(pd.DataFrame({
+            "strategy": strategy,
+            "rank": np.arange(1, len(picked) + 1),
+            "expiration": expirations[codes[first]],
+            "leg1_symbol": legs['contractSymbol'].to_numpy()[first],
+            "leg1_strike": strike[first],
+            "leg2_symbol": legs['contractSymbol'].to_numpy()[second],
+            "leg2_strike": strike[second],
+            "cost": cost,
+            "expected_profit": profits,
+            "probability_profit": probability,
+            "max_loss": cost,
+            "max_gain": max_gain,
+        }))
+    return pd.concat(tables, ignore_index=True)
@@ -0,0 +1,128 @@
+import json
+import logging
+import queue
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+STREAM_HOST = "127.0.0.1"
+STREAM_PORT = 8765
+SUBSCRIBER_QUEUE_SIZE = 1000
+KEEPALIVE_SECONDS = 15
+
+logger = logging.getLogger(__name__)
+
+
+class RecommendationStream:
+    """
+    Fans analysis results out to local subscribers. Publishing only takes a
+    lock and does non-blocking queue puts, so slow subscribers never hold up
+    the analysis loop; a subscriber whose queue is full loses its oldest events.
+    Queued events are (event type, JSON data) pairs.
+    """
+
+    def __init__(self, queue_size=SUBSCRIBER_QUEUE_SIZE):
+        self.queue_size = queue_size
+        self.latest = {}
+        self.subscribers = set()
+        self.lock = threading.Lock()
+
+    def publish(self, record):
+        event = json.dumps(record, default=str)
+        with self.lock:
+            self.latest[record["Ticker"]] = event
+            subscribers = list(self.subscribers)
+        self._send(subscribers, ("recommendation", event))
+
+    def clear(self, ticker):
+        """
+        Drops a ticker that no longer has a recommendation from the snapshot
+        and tells subscribers with a "cleared" event, if it had one.
+        """
+        with self.lock:
+            if self.latest.pop(ticker, None) is None:
+                return
+            subscribers = list(self.subscribers)
+        self._send(subscribers, ("cleared", json.dumps({"Ticker": ticker})))
+
+    @staticmethod
+    def _send(subscribers, event):
+        for subscriber in subscribers:
+            while True:
+                try:
+                    subscriber.put_nowait(event)
+                    break
+                except queue.Full:
+                    try:
+                        subscriber.get_nowait()
+                    except queue.Empty:
+                        pass
+
+    def subscribe(self):
+        """
+        Registers a subscriber and returns its queue with a snapshot of the
+        latest event per ticker.
+        """
+        subscriber = queue.Queue(maxsize=self.queue_size)
+        with self.lock:
+            snapshot = list(self.latest.values())
+            self.subscribers.add(subscriber)
+        return subscriber, snapshot
+
+    def unsubscribe(self, subscriber):
+        with self.lock:
+            self.subscribers.discard(subscriber)
+
+    def subscriber_count(self):
+        with self.lock:
+            return len(self.subscribers)
+
+
+def make_stream_handler(stream):
+    class StreamHandler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, format, *args):
+            pass
+
+        def do_GET(self):
+            if self.path.split("?")[0] != "/stream":
+                self.send_error(404)
+                return
+            self.send_response(200)
+            self.send_header("Content-Type", "text/event-stream")
+            self.send_header("Cache-Control", "no-cache")
+            self.send_header("Connection", "keep-alive")
+            self.end_headers()
+            subscriber, snapshot = stream.subscribe()
+            try:
+                for event in snapshot:
+                    self.wfile.write(f"event: snapshot\ndata: {event}\n\n".encode())
+                self.wfile.flush()
+                while True:
+                    try:
+                        kind, event = subscriber.get(timeout=KEEPALIVE_SECONDS)
+                        self.wfile.write(f"event: {kind}\ndata: {event}\n\n".encode())
+                    except queue.Empty:
+                        self.wfile.write(b": keepalive\n\n")
+                    self.wfile.flush()
+            except (BrokenPipeError, ConnectionResetError):
+                pass
+            finally:
+                stream.unsubscribe(subscriber)
+
+    return StreamHandler
+
+
+def start_stream_server(stream, host=STREAM_HOST, port=STREAM_PORT):
+    """
+    Serves GET /stream as Server-Sent Events on a background thread.
+    """
+    try:
+        server = ThreadingHTTPServer((host, port), make_stream_handler(stream))
+    except OSError as e:
+        logger.error("Could not start recommendation stream on %s:%d: %s", host, port, e)
+        return None
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="stream-server", daemon=True).start()
+    logger.info("Streaming recommendations at http://%s:%d/stream", host, port)
+    return server
@@ -0,0 +1,282 @@
+import threading
+import time
+from datetime import date, datetime, timedelta
+from types import SimpleNamespace
+from zoneinfo import ZoneInfo
+
+import gspread
+import numpy as np
+import pandas as pd
+from scipy.stats import norm
+
+from scoring import RISK_FREE_RATE
+
+MARKET_TZ = "America/New_York"
+SESSION_MINUTES = 390
+# (share of the universe, expirations, strikes per side) from the most to the least liquid names
+LIQUIDITY_TIERS = [(0.1, (16, 28), (60, 150)), (0.3, (8, 14), (25, 60)), (0.6, (4, 8), (8, 25))]
+MISSING_IV_SHARE = 0.02
+
+_EXCHANGE_TZ = ZoneInfo(MARKET_TZ)
+
+
+def synthetic_tickers(count):
+    """
+    Returns `count` distinct made-up ticker symbols.
+    """
+    letters = np.array(list("ABCDEFGHIJKLMNOPQRSTUVWXYZ"))
+    tickers = []
+    for index in range(count):
+        digits = []
+        value = index
+        for _ in range(4):
+            digits.append(letters[value % 26])
+            value //= 26
+        tickers.append("Z" + "".join(reversed(digits)))
+    return tickers
+
+
+def strike_increment(spot):
+    if spot < 25:
+        return 0.5
+    if spot < 200:
+        return 1.0
+    if spot < 1000:
+        return 5.0
+    return 10.0
+
+
+def expiration_ladder(today, count, weekly):
+    """
+    Returns `count` expiration dates: consecutive Fridays for weekly names,
+    third Fridays of each month otherwise.
+    """
+    friday = today + timedelta(days=(4 - today.weekday()) % 7 or 7)
+    if weekly:
+        return [friday + timedelta(weeks=week) for week in range(count)]
+    dates = []
+    year, month = today.year, today.month
+    while len(dates) < count:
+        first = date(year, month, 1)
+        third = first + timedelta(days=(4 - first.weekday()) % 7 + 14)
+        if third > today:
+            dates.append(third)
+        year, month = (year + 1, 1) if month == 12 else (year, month + 1)
+    return dates
+
+
+class SyntheticMarket:
+    """
+    Deterministic made-up market for load tests. Each ticker gets a
+    lognormal spot price, a liquidity tier that sets its expiration ladder
+    and strike count, an ATM volatility with a term structure and a skewed
+    smile, and Black-Scholes prices with noise. Chains are regenerated on
+    every call, as a real provider would return fresh frames, and the time
+    spent generating is tracked so it can be separated from pipeline time.
+    """
+
+    def __init__(self, tickers, seed=0, latency=0.0, today=None):
+        self.seed = seed
+        self.latency = latency
+        self.today = today or datetime.now(_EXCHANGE_TZ).date()
+        self.seconds = 0.0
+        self.calls = 0
+        self.lock = threading.Lock()
+        rng = np.random.default_rng(seed)
+        count = len(tickers)
+        spots = np.clip(np.round(rng.lognormal(np.log(80), 1.0, count), 2), 2.0, 3000.0)
+        shares = np.cumsum([share for share, _, _ in LIQUIDITY_TIERS])
+        tiers = np.searchsorted(shares, (np.arange(count) + 0.5) / count)
+        self.profiles = {}
+        for index, ticker in enumerate(tickers):
+            _, expirations, strikes = LIQUIDITY_TIERS[tiers[index]]
+            self.profiles[ticker] = {
+                "index": index,
+                "spot": float(spots[index]),
+                "weekly": tiers[index] == 0,
+                "expirations": int(rng.integers(*expirations, endpoint=True)),
+                "strikes": int(rng.integers(*strikes, endpoint=True)),
+                "atm_iv": float(rng.uniform(0.15, 0.35) + 0.15 * tiers[index]),
+                "skew": float(rng.uniform(0.05, 0.25)),
+                "curvature": float(rng.uniform(0.02, 0.12)),
+            }
+
+    def _timed(self, start):
+        with self.lock:
+            self.seconds += time.perf_counter() - start
+            self.calls += 1
+        if self.latency:
+            time.sleep(self.latency)
+
+    def expirations(self, ticker):
+        profile = self.profiles[ticker]
+        ladder = expiration_ladder(self.today, profile['expirations'], profile['weekly'])
+        return tuple(day.isoformat() for day in ladder)
+
+    def quote(self, ticker):
+        return {"regularMarketPrice": self.profiles[ticker]['spot'], "regularMarketTime": time.time(),
+                "marketState": "REGULAR"}
+
+    def option_chain(self, ticker, expiration):
+        start = time.perf_counter()
+        profile = self.profiles[ticker]
+        spot = profile['spot']
+        expiry = date.fromisoformat(expiration)
+        rng = np.random.default_rng((self.seed, profile['index'], expiry.toordinal()))
+        years = max((expiry - self.today).days, 1) / 365
+        step = strike_increment(spot)
+        center = round(spot / step) * step
+        strikes = np.round(center + step * np.arange(-profile['strikes'], profile['strikes'] + 1), 2)
+        strikes = strikes[strikes > 0]
+        moneyness = np.log(strikes / spot) / np.sqrt(years)
+        atm = profile['atm_iv'] * (1 + 0.15 * np.exp(-12 * years))
+        iv = np.clip(atm * (1 - profile['skew'] * moneyness + profile['curvature'] * moneyness ** 2), 0.05, 3.0)
+        d1 = (np.log(spot / strikes) + (RISK_FREE_RATE + 0.5 * iv ** 2) * years) / (iv * np.sqrt(years))
+        d2 = d1 - iv * np.sqrt(years)
+        discount = np.exp(-RISK_FREE_RATE * years)
+        prices = {
+            "call": spot * norm.cdf(d1) - strikes * discount * norm.cdf(d2),
+            "put": strikes * discount * norm.cdf(-d2) - spot * norm.cdf(-d1),
+        }
+        code = expiry.strftime("%y%m%d")
+        frames = {}
+        for kind, price in prices.items():
+            fair = np.maximum(price, 0.0)
+            half_spread = np.maximum(0.01, fair * rng.uniform(0.01, 0.08, len(strikes)))
+            last = np.round(np.maximum(fair * (1 + rng.normal(0, 0.03, len(strikes))), 0.01), 2)
+            quoted_iv = iv * (1 + rng.normal(0, 0.02, len(strikes)))
+            quoted_iv[rng.random(len(strikes)) < MISSING_IV_SHARE] = np.nan
+            activity = np.exp(-2 * np.abs(moneyness)) * (3 if profile['weekly'] else 1)
+            frames[kind] = pd.DataFrame({
+                "contractSymbol": [f"{ticker}{code}{kind[0].upper()}{int(round(k * 1000)):08d}" for k in strikes],
+                "strike": strikes,
+                "lastPrice": last,
+                "bid": np.round(np.maximum(fair - half_spread, 0.0), 2),
+                "ask": np.round(fair + half_spread, 2),
+                "volume": rng.poisson(500 * activity / (1 + 2 * profile['index'] / len(self.profiles))).astype(float),
+                "openInterest": rng.poisson(5000 * activity),
+                "impliedVolatility": quoted_iv,
+                "inTheMoney": strikes < spot if kind == "call" else strikes > spot,
+            })
+        self._timed(start)
+        return SimpleNamespace(calls=frames["call"], puts=frames["put"])
+
+    def session_bars(self, ticker, start=None):
+        """
+        Returns a geometric random walk of 1-minute bars for the latest
+        session ending at the ticker's spot price, from `start` if given.
+        """
+        began = time.perf_counter()
+        profile = self.profiles[ticker]
+        rng = np.random.default_rng((self.seed, profile['index'], self.today.toordinal(), 1))
+        sigma = profile['atm_iv'] / np.sqrt(252 * SESSION_MINUTES)
+        path = np.exp(np.cumsum(rng.normal(0, sigma, SESSION_MINUTES + 1)))
+        close = profile['spot'] * path[1:] / path[-1]
+        open_ = np.concatenate(([close[0] / path[1] * path[0]], close[:-1]))
+        wiggle = np.abs(rng.normal(0, sigma, SESSION_MINUTES)) * close
+        session = self.today
+        while session.weekday() >= 5:
+            session -= timedelta(days=1)
+        index = pd.date_range(datetime(session.year, session.month, session.day, 9, 30, tzinfo=_EXCHANGE_TZ),
+                              periods=SESSION_MINUTES, freq="1min")
+        frame = pd.DataFrame({"Open": open_, "High": np.maximum(open_, close) + wiggle,
+                              "Low": np.minimum(open_, close) - wiggle, "Close": close,
+                              "Volume": rng.poisson(20000, SESSION_MINUTES).astype(float)}, index=index)
+        if start is not None:
+            frame = frame[frame.index >= pd.Timestamp(start, unit='s', tz='UTC')]
+        self._timed(began)
+        return frame
+
+    def provider(self):
+        """
+        Returns an object with the parts of the yfinance module the pipeline
+        uses, to be swapped in for `main.yf` and `bars.yf`.
+        """
+        market = self
+
+        class SyntheticTicker:
+            def __init__(self, ticker):
+                self.ticker = ticker
+                self.options = market.expirations(ticker)
+                self._underlying = market.quote(ticker)
+
+            def option_chain(self, expiration):
+                return market.option_chain(self.ticker, expiration)
+
+        def download(ticker, period=None, start=None, interval=None, progress=False):
+            return market.session_bars(ticker, start)
+
+        return SimpleNamespace(Ticker=SyntheticTicker, download=download)
+
+
+class FakeSheet:
+    """
+    In-memory stand-in for a gspread worksheet that sleeps per API call and
+    per row to mimic Sheets latency.
+    """
+
+    def __init__(self, title="Sheet1", call_latency=0.0, row_latency=0.0):
+        self.title = title
+        self.call_latency = call_latency
+        self.row_latency = row_latency
+        self.rows = []
+        self.api_calls = 0
+
+    def _call(self, rows=0):
+        self.api_calls += 1
+        if self.call_latency or self.row_latency:
+            time.sleep(self.call_latency + self.row_latency * rows)
+
+    def clear(self):
+        self._call()
+        self.rows = []
+
+    def append_row(self, row):
+        self.append_rows([row])
+
+    def append_rows(self, rows, **kwargs):
+        self._call(len(rows))
+        self.rows.extend(list(row) for row in rows)
+
+    def get(self, range_name):
+        self._call()
+        first, last = (int("".join(filter(str.isdigit, part))) for part in range_name.split(":"))
+        return self.rows[first - 1:last]
+
+    def delete_rows(self, start_index, end_index=None):
+        end_index = start_index if end_index is None else end_index
+        self._call(end_index - start_index + 1)
+        del self.rows[start_index - 1:end_index]
+
+
+class FakeSpreadsheet:
+    def __init__(self, call_latency=0.0, row_latency=0.0):
+        self.call_latency = call_latency
+        self.row_latency = row_latency
+        self.sheet1 = FakeSheet("Sheet1", call_latency, row_latency)
+        self.tabs = {}
+
+    def worksheet(self, title):
+        if title not in self.tabs:
+            raise gspread.exceptions.WorksheetNotFound(title)
+        return self.tabs[title]
+
+    def add_worksheet(self, title, rows=1000, cols=26):
+        self.tabs[title] = FakeSheet(title, self.call_latency, self.row_latency)
+        return self.tabs[title]
+
+
+class FakeClient:
+    """
+    Stand-in for an authorized gspread client; opens one FakeSpreadsheet per key.
+    """
+
+    def __init__(self, call_latency=0.0, row_latency=0.0):
+        self.call_latency = call_latency
+        self.row_latency = row_latency
+        self.spreadsheets = {}
+
+    def open_by_key(self, key):
+        if key not in self.spreadsheets:
+            self.spreadsheets[key] = FakeSpreadsheet(self.call_latency, self.row_latency)
+        return self.spreadsheets[key]
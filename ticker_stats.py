@@ -0,0 +1,156 @@
+import logging
+import math
+import os
+import threading
+
+import numpy as np
+
+STATS_PATH = "ticker_stats.npz"
+STAT_FIELDS = ("edge", "premium", "spot")
+STATS_REPORT_TOP_N = 5
+
+logger = logging.getLogger(__name__)
+
+
+def _update(moments, value):
+    """
+    Welford update of [count, mean, M2, min, max] with one value, in place.
+    """
+    count = moments[0] + 1
+    delta = value - moments[1]
+    mean = moments[1] + delta / count
+    moments[0], moments[1] = count, mean
+    moments[2] += delta * (value - mean)
+    moments[3] = min(moments[3], value)
+    moments[4] = max(moments[4], value)
+
+
+def _summary(moments):
+    count, mean, m2, low, high = moments
+    if not count:
+        return None
+    return {"count": int(count), "mean": mean, "std": math.sqrt(m2 / (count - 1)) if count > 1 else 0.0,
+            "min": low, "max": high}
+
+
+class TickerStatistics:
+    """
+    Running mean, variance, min and max of each ticker's recommended edge
+    and premium and of its spot, plus how often it gets a recommendation,
+    over the life of the daemon. Every analysis is folded in with a
+    Welford update, so nothing is recomputed from past rows, and the state
+    persists to a single npz so restarts keep the history.
+    """
+
+    def __init__(self, path=STATS_PATH):
+        self.path = path
+        self.state = {}
+        self.dirty = False
+        self.lock = threading.Lock()
+
+    def _entry(self, ticker):
+        entry = self.state.get(ticker)
+        if entry is None:
+            entry = {"analyses": 0, "recommended": 0,
+                     "moments": [[0, 0.0, 0.0, math.inf, -math.inf] for _ in STAT_FIELDS]}
+            self.state[ticker] = entry
+        return entry
+
+    def observe(self, ticker, stock_info, spot=None):
+        """
+        Folds one analysis of `ticker` in: its spot if known and, when it
+        produced a recommendation, the recommended edge and premium.
+        """
+        values = {"spot": spot}
+        if stock_info:
+            values.update(edge=stock_info.get("Market Edge"), premium=stock_info.get("Premium"))
+        with self.lock:
+            entry = self._entry(ticker)
+            entry['analyses'] += 1
+            entry['recommended'] += 1 if stock_info else 0
+            for name, moments in zip(STAT_FIELDS, entry['moments']):
+                value = values.get(name)
+                if value is not None and math.isfinite(float(value)):
+                    _update(moments, float(value))
+            self.dirty = True
+
+    def ticker_summary(self, ticker):
+        with self.lock:
+            entry = self.state.get(ticker)
+            if entry is None:
+                return None
+            summary = {"analyses": entry['analyses'], "recommended": entry['recommended'],
+                       "frequency": entry['recommended'] / entry['analyses'] if entry['analyses'] else 0.0}
+            summary.update((name, _summary(moments)) for name, moments in zip(STAT_FIELDS, entry['moments']))
+        return summary
+
+    def metrics(self, top_n=STATS_REPORT_TOP_N):
+        """
+        Returns universe-wide figures and the top_n tickers by recommendation
+        frequency, shaped for the `extra` of a structured log record.
+        """
+        with self.lock:
+            tickers = list(self.state)
+            analyses = sum(entry['analyses'] for entry in self.state.values())
+            recommended = sum(entry['recommended'] for entry in self.state.values())
+            ranked = sorted(tickers, key=lambda ticker: (-self.state[ticker]['recommended'] /
+                                                          max(self.state[ticker]['analyses'], 1), ticker))
+        return {"tracked": len(tickers), "analyses": analyses, "recommended": recommended,
+                "frequency": recommended / analyses if analyses else 0.0,
+                "top": {ticker: self.ticker_summary(ticker) for ticker in ranked[:top_n]}}
+
+    def report(self, top_n=STATS_REPORT_TOP_N):
+        """
+        Returns one summary line for the universe and one per top_n ticker by
+        recommendation frequency.
+        """
+        metrics = self.metrics(top_n)
+        lines = [f"{metrics['tracked']} tickers, {metrics['analyses']} analyses, "
+                 f"{metrics['frequency']:.1%} recommended"]
+        for ticker, summary in metrics['top'].items():
+            line = f"{ticker}: recommended {summary['recommended']}/{summary['analyses']} ({summary['frequency']:.0%})"
+            for name in STAT_FIELDS:
+                if summary[name]:
+                    line += (f" {name} {summary[name]['mean']:.2f}±{summary[name]['std']:.2f}"
+                             f" [{summary[name]['min']:.2f}, {summary[name]['max']:.2f}]")
+            lines.append(line)
+        return lines
+
+    def load(self):
+        """
+        Restores the state saved by save(); a missing or unreadable file
+        starts empty.
+        """
+        if not os.path.exists(self.path):
+            return
+        try:
+            with np.load(self.path) as data:
+                tickers, counts, moments = data['tickers'], data['counts'], data['moments']
+        except Exception as e:
+            logger.warning("Ignoring unreadable ticker statistics %s: %s", self.path, e)
+            return
+        with self.lock:
+            for ticker, (analyses, recommended), ticker_moments in zip(tickers.tolist(), counts.tolist(),
+                                                                       moments.tolist()):
+                self.state[ticker] = {"analyses": analyses, "recommended": recommended, "moments": ticker_moments}
+
+    def save(self):
+        """
+        Writes the state atomically if anything changed since the last save,
+        as one row of counts and one of moments per ticker.
+        """
+        with self.lock:
+            if not self.dirty:
+                return
+            tickers = list(self.state)
+            counts = np.array([[self.state[ticker]['analyses'], self.state[ticker]['recommended']]
+                               for ticker in tickers], dtype=np.int64).reshape(-1, 2)
+            moments = np.array([self.state[ticker]['moments'] for ticker in tickers],
+                               dtype=float).reshape(-1, len(STAT_FIELDS), 5)
+            self.dirty = False
+        temp_path = f"{self.path}.tmp.npz"
+        try:
+            np.savez(temp_path, tickers=np.array(tickers, dtype=str), counts=counts, moments=moments)
+            os.replace(temp_path, self.path)
+        except OSError as e:
+            logger.warning("Error saving ticker statistics: %s", e)
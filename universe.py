@@ -0,0 +1,47 @@
+import logging
+import os
+
+logger = logging.getLogger(__name__)
+
+
+class TickerUniverse:
+    """
+    The ticker list from the stocks file, reloaded when the file's mtime or
+    size changes. Changes are only picked up when poll() is called, which the
+    main loop does between cycles and while it waits.
+    """
+
+    def __init__(self, path, loader):
+        self.path = path
+        self.loader = loader
+        self.signature = self._signature()
+        self.tickers = loader(path)
+
+    def _signature(self):
+        try:
+            stat = os.stat(self.path)
+            return stat.st_mtime_ns, stat.st_size
+        except OSError:
+            return None
+
+    def poll(self):
+        """
+        Reloads the file if it changed and returns the (added, removed) tickers.
+        """
+        signature = self._signature()
+        if signature == self.signature:
+            return [], []
+        self.signature = signature
+        tickers = self.loader(self.path)
+        if not tickers and signature is None:
+            logger.warning("Stocks file %s disappeared; keeping the current %d tickers.", self.path, len(self.tickers))
+            return [], []
+        current = set(self.tickers)
+        added = [ticker for ticker in tickers if ticker not in current]
+        kept = set(tickers)
+        removed = [ticker for ticker in self.tickers if ticker not in kept]
+        self.tickers = tickers
+        if added or removed:
+            logger.info("Ticker universe changed: %d added (%s), %d removed (%s).",
+                        len(added), ", ".join(added[:10]), len(removed), ", ".join(removed[:10]))
+        return added, removed